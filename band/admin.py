@@ -1,5 +1,12 @@
 from django.contrib import admin
-from .models import PastEvent, Comments, Likes, Bookings, UpcomingEvent
+from .models import (
+    PastEvent,
+    Comments,
+    Likes,
+    Bookings,
+    BookingHistory,
+    UpcomingEvent,
+)
 
 # Register your models here.
 admin.site.register(PastEvent)
@@ -7,3 +14,4 @@ admin.site.register(Comments)
 admin.site.register(Likes)
 admin.site.register(Bookings)
 admin.site.register(UpcomingEvent)
+admin.site.register(BookingHistory)
@@ -0,0 +1,294 @@
+"""
+Read-only JSON API, version 1.
+
+Lists are keyset paginated (see band.pagination): each response carries
+"next" and "previous" URLs, and ``?limit=`` picks the page size. Rows
+are read as .values() projections, never as model instances, and the
+JSON is streamed out in batches. Every endpoint sends an ETag, and a
+client revalidating an unchanged list gets a 304 after a single query.
+The views are async, so under an ASGI server a request waiting on the
+database or a slow client holds no thread.
+"""
+
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from .availability import month_availability
+from .conditional import aevent_changes, conditional_page, page_validators
+from .models import Comments, PastEvent, UpcomingEvent
+from .pagination import apage_changes, apaginate_by_date, apaginate_by_id
+from .replicas import read_from_replica
+from .streaming import stream_body
+
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+# Rows serialized per chunk of a streamed response.
+STREAM_BATCH = 50
+
+EVENT_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "date",
+    "location",
+    "like_count",
+    "image",
+    "image_width",
+    "image_height",
+    "image_placeholder",
+    "image_derivatives",
+)
+PAST_EVENT_FIELDS = EVENT_FIELDS + ("comment_count", "rating_sum")
+
+
+def dumps(value):
+    """Encodes a value as compact JSON bytes."""
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode()
+
+
+def _limit(req):
+    try:
+        limit = int(req.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _page_url(req, cursor):
+    if cursor is None:
+        return None
+    params = req.GET.copy()
+    params["cursor"] = cursor
+    return f"{req.path}?{params.urlencode()}"
+
+
+def _list_response(req, page, serialize):
+    """
+    Streams a page as {"results": [...], "next": url, "previous": url},
+    serializing STREAM_BATCH rows at a time.
+    """
+
+    def chunks():
+        yield b'{"results":['
+        rows = page.object_list
+        for start in range(0, len(rows), STREAM_BATCH):
+            batch = b",".join(
+                dumps(serialize(row)) for row in rows[start : start + STREAM_BATCH]
+            )
+            yield (b"," if start else b"") + batch
+        yield b'],"next":%s,"previous":%s}' % (
+            dumps(_page_url(req, page.next_cursor)),
+            dumps(_page_url(req, page.prev_cursor)),
+        )
+
+    return StreamingHttpResponse(
+        stream_body(req, chunks(), blocking=False), content_type="application/json"
+    )
+
+
+def _image(model, row):
+    name = row["image"]
+    if not name:
+        return None
+    storage = model._meta.get_field("image").storage
+    derivatives = row["image_derivatives"] or {}
+    variants = (
+        derivatives.get("variants", []) if derivatives.get("source") == name else []
+    )
+    return {
+        "url": storage.url(name),
+        "width": row["image_width"],
+        "height": row["image_height"],
+        "placeholder": row["image_placeholder"] or None,
+        "variants": [
+            {
+                "url": storage.url(variant["name"]),
+                "format": variant["format"],
+                "width": variant["width"],
+                "height": variant["height"],
+            }
+            for variant in variants
+        ],
+    }
+
+
+def _event(model, row):
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "date": row["date"],
+        "location": row["location"],
+        "likes": row["like_count"],
+        "image": _image(model, row),
+    }
+
+
+def _past_event(row):
+    comments = row["comment_count"]
+    return {
+        **_event(PastEvent, row),
+        "comments": comments,
+        "rating": round(row["rating_sum"] / comments, 2) if comments else None,
+    }
+
+
+def _upcoming_event(row):
+    return _event(UpcomingEvent, row)
+
+
+def _comment(row):
+    return {
+        "id": row["id"],
+        "user": row["username"],
+        "review_text": row["review_text"],
+        "rating": row["rating"],
+        "date": row["date"],
+        "time": row["time"],
+    }
+
+
+def _upcoming_rows():
+    return UpcomingEvent.objects.filter(date__gte=timezone.now().date())
+
+
+async def _past_events_validators(req):
+    changes = await apage_changes(
+        PastEvent.objects.all(), req.GET.get("cursor"), _limit(req)
+    )
+    return page_validators(req, ("api", "past"), changes, per_user=False)
+
+
+async def _upcoming_events_validators(req):
+    changes = await apage_changes(_upcoming_rows(), req.GET.get("cursor"), _limit(req))
+    return page_validators(req, ("api", "upcoming"), changes, per_user=False)
+
+
+async def _comments_validators(req, pk):
+    changes = await aevent_changes(pk)
+    if changes is None:
+        return None, None
+    return page_validators(req, ("api", "comments", pk), changes, per_user=False)
+
+
+@require_safe
+@read_from_replica
+@conditional_page(_past_events_validators)
+async def past_events(req):
+    """
+    Lists past events, newest first.
+
+    Args:
+        req (_type_): The request object. Takes "cursor" and "limit"
+        query parameters.
+
+    Returns:
+        StreamingHttpResponse: A page of events with their like and
+        comment counts, average rating and image copies.
+    """
+    page = await apaginate_by_date(
+        PastEvent.objects.values(*PAST_EVENT_FIELDS),
+        req.GET.get("cursor"),
+        _limit(req),
+    )
+    return _list_response(req, page, _past_event)
+
+
+@require_safe
+@read_from_replica
+@conditional_page(_upcoming_events_validators)
+async def upcoming_events(req):
+    """
+    Lists upcoming events from today on, furthest date first.
+
+    Args:
+        req (_type_): The request object. Takes "cursor" and "limit"
+        query parameters.
+
+    Returns:
+        StreamingHttpResponse: A page of events with their like counts
+        and image copies.
+    """
+    page = await apaginate_by_date(
+        _upcoming_rows().values(*EVENT_FIELDS),
+        req.GET.get("cursor"),
+        _limit(req),
+    )
+    return _list_response(req, page, _upcoming_event)
+
+
+@require_safe
+@read_from_replica
+@conditional_page(_comments_validators)
+async def event_comments(req, pk):
+    """
+    Lists the comments of a past event, newest first.
+
+    Args:
+        req (_type_): The request object. Takes "cursor" and "limit"
+        query parameters.
+        pk (int): The past event's ID.
+
+    Raises:
+        Http404: If the event does not exist.
+
+    Returns:
+        StreamingHttpResponse: A page of comments with their authors'
+        usernames.
+    """
+    etag, _ = req.page_validators
+    if etag is None:
+        raise Http404("No event matches the given query.")
+    # By id alone: comments may have no date.
+    page = await apaginate_by_id(
+        Comments.objects.filter(event_id=pk).values(
+            "id",
+            "review_text",
+            "rating",
+            "date",
+            "time",
+            username=F("user__username"),
+        ),
+        req.GET.get("cursor"),
+        _limit(req),
+    )
+    return _list_response(req, page, _comment)
+
+
+# Not read from a replica: the month it reads is cached until the next
+# booking, and one read from a replica that hasn't caught up with that
+# booking would be cached without it.
+@require_safe
+async def booking_calendar(req, year, month):
+    """
+    Lists the free and taken booking dates of a month. The month is
+    usually served from the availability cache, and its ETag is the
+    hash of the JSON.
+
+    Args:
+        req (_type_): The request object.
+        year (int): The calendar year.
+        month (int): The calendar month, 1-12.
+
+    Returns:
+        HttpResponse: The month's free and taken ISO dates.
+    """
+    try:
+        data = await sync_to_async(month_availability)(year, month)
+    except ValueError:
+        raise Http404("No such month.")
+    body = dumps(data)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    response = get_conditional_response(req, etag=etag) or HttpResponse(
+        body, content_type="application/json"
+    )
+    response["ETag"] = etag
+    return response
@@ -0,0 +1,95 @@
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import invalidate_availability
+from .metrics import recorded_job
+from .models import Likes, PastEvent, UpcomingEvent
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+
+@recorded_job("archive-events")
+def archive_expired_events(today=None):
+    """
+    Moves every upcoming event dated before today into PastEvent.
+    The whole move runs in a single transaction: the expired rows and
+    their likes are read once, the upcoming rows are bulk deleted and the
+    past events and their likes are bulk inserted, so the number of
+    queries does not grow with the number of archived events. The
+    deletes skip Django's collector, which would fetch the rows again
+    and send post_delete for each; the caches those signals invalidate
+    are invalidated here instead, once.
+    Images are carried over and every user who liked the upcoming event
+    becomes a Likes row on the archived event, with like_count to match.
+
+    Args:
+        today (date, optional): The cut-off date. Events dated before it
+        are archived. Defaults to the current date.
+
+    Returns:
+        int: The number of events archived. Returns 0 when another
+        process archived the same events first.
+    """
+    today = today or timezone.now().date()
+    with transaction.atomic():
+        expired = list(
+            UpcomingEvent.objects.select_for_update()
+            .filter(date__lt=today)
+            .order_by("pk")
+        )
+        if not expired:
+            return 0
+        expired_ids = [event.pk for event in expired]
+        Through = UpcomingEvent.likes.through
+        liked_by = {}
+        for event_id, user_id in Through.objects.filter(
+            upcomingevent_id__in=expired_ids
+        ).values_list("upcomingevent_id", "user_id"):
+            liked_by.setdefault(event_id, []).append(user_id)
+
+        # QuerySet._raw_delete is the single DELETE that delete() itself
+        # runs when it has no signals or cascades to handle. It is private
+        # API, kept for the fixed query count; RawDeleteTests pins the
+        # behaviour relied on here: one statement, no signals, the number
+        # of rows deleted returned.
+        likes = Through.objects.filter(upcomingevent_id__in=expired_ids)
+        likes._raw_delete(likes.db)
+        rows = UpcomingEvent.objects.filter(pk__in=expired_ids)
+        if rows._raw_delete(rows.db) != len(expired):
+            # Someone else archived some of these rows in the meantime.
+            transaction.set_rollback(True)
+            return 0
+
+        past_events = PastEvent.objects.bulk_create(
+            [
+                PastEvent(
+                    name=event.name,
+                    description=event.description,
+                    date=event.date,
+                    location=event.location,
+                    image=event.image,
+                    image_derivatives=event.image_derivatives,
+                    image_ready=event.image_ready,
+                    image_width=event.image_width,
+                    image_height=event.image_height,
+                    image_placeholder=event.image_placeholder,
+                    like_count=len(liked_by.get(event.pk, [])),
+                )
+                for event in expired
+            ]
+        )
+        Likes.objects.bulk_create(
+            [
+                Likes(event=past_event, user_id=user_id)
+                for event, past_event in zip(expired, past_events)
+                for user_id in liked_by.get(event.pk, [])
+            ]
+        )
+        invalidate_availability()
+        for event in expired:
+            bump_version(UpcomingEvent, event.pk)
+    logger.info("Archived %d upcoming events", len(expired))
+    return len(expired)
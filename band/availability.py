@@ -0,0 +1,96 @@
+import calendar
+import datetime
+
+from django.utils import timezone
+
+from .cache import BandCache
+from .models import Bookings, UpcomingEvent
+
+# Bookings with any other band_response have been rejected and free
+# their date again.
+BLOCKING_RESPONSES = ("Pending", "Confirmed")
+
+MONTH_CACHE_TIMEOUT = 60 * 15
+
+availability_cache = BandCache(
+    "availability", timeout=MONTH_CACHE_TIMEOUT, generational=True
+)
+
+
+def _taken_dates(start, end):
+    """
+    Returns the set of dates between start and end (inclusive) that
+    already have an upcoming event or a live booking. Both sides are
+    indexed range scans combined into a single UNION query.
+    """
+    events = UpcomingEvent.objects.filter(date__range=(start, end)).values_list("date")
+    bookings = Bookings.objects.filter(
+        booking_date__range=(start, end), band_response__in=BLOCKING_RESPONSES
+    ).values_list("booking_date")
+    return {taken for (taken,) in events.union(bookings)}
+
+
+def is_date_free(date):
+    """
+    Checks whether the band can still be booked on the given date.
+
+    Args:
+        date (date): The requested date.
+
+    Returns:
+        bool: False if the date is in the past or already has an
+        upcoming event or a pending/confirmed booking.
+    """
+    if date < timezone.now().date():
+        return False
+    return not _taken_dates(date, date)
+
+
+def invalidate_availability():
+    """
+    Drops every cached month. Called whenever an upcoming event or a
+    booking is saved or deleted; moving to a new generation is cheaper
+    and safer than working out which months a change touched.
+    """
+    availability_cache.invalidate()
+
+
+def month_availability(year, month):
+    """
+    Lists the free and taken dates of a calendar month.
+    The taken dates are cached per month until the next booking or
+    event change; which of the remaining dates are free is worked out
+    against today's date on every call.
+
+    Args:
+        year (int): The calendar year.
+        month (int): The calendar month, 1-12.
+
+    Raises:
+        ValueError: If year/month is not a valid calendar month.
+
+    Returns:
+        dict: "year", "month", and the ISO dates that are "free" and
+        "taken". Past dates are in neither list.
+    """
+    days_in_month = calendar.monthrange(year, month)[1]
+    first = datetime.date(year, month, 1)
+    last = datetime.date(year, month, days_in_month)
+
+    taken = availability_cache.get_or_set(
+        f"{year}-{month:02d}", lambda: sorted(_taken_dates(first, last))
+    )
+
+    today = timezone.now().date()
+    taken = {day for day in taken if day >= today}
+    free = [
+        day
+        for day in (first + datetime.timedelta(days=n) for n in range(days_in_month))
+        if day >= today and day not in taken
+    ]
+    return {
+        "year": year,
+        "month": month,
+        "free": [day.isoformat() for day in free],
+        "taken": [day.isoformat() for day in sorted(taken)],
+    }
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .metrics import CACHE_READS
+from .performance import record_cache_read
+
+_MISSING = object()
+
+_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+_stats_lock = threading.Lock()
+
+
+def _record(namespace, hit):
+    with _stats_lock:
+        _stats[namespace]["hits" if hit else "misses"] += 1
+    CACHE_READS.labels(namespace, "hit" if hit else "miss").inc()
+    record_cache_read(hit)
+
+
+def cache_stats():
+    """
+    Returns the hit and miss counters of this process, per namespace.
+
+    Returns:
+        dict: {namespace: {"hits": int, "misses": int}}
+    """
+    with _stats_lock:
+        return {namespace: dict(counts) for namespace, counts in _stats.items()}
+
+
+def reset_cache_stats():
+    """
+    Sets every hit and miss counter back to zero.
+    """
+    with _stats_lock:
+        _stats.clear()
+
+
+class BandCache:
+    """
+    Namespaced view of a Django cache backend, shared by the band app's
+    caching features.
+
+    Keys are prefixed with "band:<namespace>:". Every read is counted as
+    a hit or a miss in cache_stats(). A generational namespace also puts
+    a generation number in its keys, so invalidate() drops every entry
+    of the namespace at once without deleting keys one by one.
+
+    The backend is picked in settings (CACHES), so the same code works
+    with the per-process, filesystem and Redis backends.
+    """
+
+    def __init__(
+        self, namespace, timeout=DEFAULT_TIMEOUT, generational=False, alias="default"
+    ):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.generational = generational
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _generation_key(self):
+        return f"band:{self.namespace}:generation"
+
+    def generation(self):
+        """
+        Returns the current generation of the namespace, creating it
+        when missing. Non-generational namespaces can put it in their
+        keys themselves when a key must stay fixed across a change.
+        """
+        key = self._generation_key()
+        generation = self.backend.get(key)
+        if generation is None:
+            self.backend.add(key, time.time_ns(), None)
+            generation = self.backend.get(key)
+        return generation
+
+    def invalidate(self):
+        """
+        Drops every entry keyed on the current generation by moving to
+        a new one. The old entries expire on their own.
+        """
+        # A timestamp rather than a counter: if the generation key is
+        # evicted, an old generation can never come back.
+        self.backend.set(self._generation_key(), time.time_ns(), None)
+
+    def make_key(self, key):
+        if self.generational:
+            return f"band:{self.namespace}:{self.generation()}:{key}"
+        return f"band:{self.namespace}:{key}"
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key, default=None):
+        value = self.backend.get(self.make_key(key), _MISSING)
+        _record(self.namespace, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys):
+        """
+        Fetches several keys in one round trip.
+
+        Returns:
+            dict: The found values, keyed by the keys as passed in.
+        """
+        full_keys = {self.make_key(key): key for key in keys}
+        found = self.backend.get_many(full_keys)
+        for _ in found:
+            _record(self.namespace, True)
+        for _ in range(len(full_keys) - len(found)):
+            _record(self.namespace, False)
+        return {full_keys[full_key]: value for full_key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self.backend.set(self.make_key(key), value, self._timeout(timeout))
+
+    def set_many(self, mapping, timeout=DEFAULT_TIMEOUT):
+        self.backend.set_many(
+            {self.make_key(key): value for key, value in mapping.items()},
+            self._timeout(timeout),
+        )
+
+    def delete(self, key):
+        self.backend.delete(self.make_key(key))
+
+    def get_or_set(
+        self,
+        key,
+        producer,
+        timeout=DEFAULT_TIMEOUT,
+        lock_timeout=30,
+        wait=0.05,
+        retries=20,
+    ):
+        """
+        Returns the cached value of key, computing it with producer() on
+        a miss.
+        Only one caller at a time computes a missing value: the others
+        wait for it to appear instead of all hitting the database (cache
+        stampede). If it does not appear within retries * wait seconds,
+        they compute it themselves.
+        The lock is taken with the backend's add(), which is atomic on
+        Redis and within one process on the local memory backend.
+
+        Args:
+            key (str): The key within the namespace.
+            producer (callable): Computes the value on a miss.
+            timeout (int, optional): Seconds to keep the value.
+            lock_timeout (int): Seconds after which a lock held by a
+            crashed caller expires.
+            wait (float): Seconds between checks while waiting.
+            retries (int): Checks before giving up on waiting.
+
+        Returns:
+            The cached or computed value.
+        """
+        full_key = self.make_key(key)
+        value = self.backend.get(full_key, _MISSING)
+        _record(self.namespace, value is not _MISSING)
+        if value is not _MISSING:
+            return value
+
+        lock_key = f"{full_key}:lock"
+        if self.backend.add(lock_key, 1, lock_timeout):
+            try:
+                value = producer()
+                self.backend.set(full_key, value, self._timeout(timeout))
+            finally:
+                self.backend.delete(lock_key)
+            return value
+
+        for _ in range(retries):
+            time.sleep(wait)
+            value = self.backend.get(full_key, _MISSING)
+            if value is not _MISSING:
+                return value
+        return producer()
@@ -0,0 +1,151 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .models import PastEvent
+
+
+def page_validators(req, parts, changes, per_user=True):
+    """
+    Turns the state a page is rendered from into an (ETag, Last-Modified)
+    pair. Besides ``parts`` and ``changes``, the ETag covers today's
+    date, which decides what is upcoming, and, for per-user pages not
+    rendered for the shared anonymous page cache, the session and CSRF
+    cookies, which decide the navigation bar and the token in the
+    page's forms. None of it needs the session or the user to be loaded.
+
+    Args:
+        req (_type_): The request object.
+        parts (tuple): Anything else the page depends on.
+        changes (list): What the page is read from, as tuples starting
+        with an updated_at: the (updated_at, id) pairs of a keyset page
+        (see band.pagination.page_changes), or (updated_at, row count)
+        pairs, where the count catches deletions.
+        per_user (bool): Whether the response depends on the visitor.
+
+    Returns:
+        tuple: The ETag and the newest updated_at (or None).
+    """
+    cookies = ()
+    if per_user and not getattr(req, "cacheable_page", False):
+        cookies = (
+            req.COOKIES.get(settings.SESSION_COOKIE_NAME),
+            req.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        )
+    state = (parts, changes, cookies, timezone.localdate())
+    etag = hashlib.md5(repr(state).encode()).hexdigest()
+    last_modified = max((updated for updated, *_ in changes if updated), default=None)
+    return etag, last_modified
+
+
+def _event_changes_query(pk):
+    return (
+        PastEvent.objects.filter(pk=pk)
+        .annotate(
+            comments_updated=Max("comments__updated_at"),
+            comments_rows=Count("comments"),
+        )
+        .values_list("updated_at", "comments_updated", "comments_rows")
+    )
+
+
+def _event_pairs(row):
+    if row is None:
+        return None
+    updated, comments_updated, comments = row
+    return [(updated, 1), (comments_updated, comments)]
+
+
+def event_changes(pk):
+    """
+    Reads a past event's updated_at and the newest updated_at and count
+    of its comments in one query.
+
+    Returns:
+        list: The two (updated_at, row count) pairs, or None if there is
+        no such event.
+    """
+    return _event_pairs(_event_changes_query(pk).first())
+
+
+async def aevent_changes(pk):
+    """Async version of event_changes."""
+    return _event_pairs(await _event_changes_query(pk).afirst())
+
+
+def details_validators(req, pk):
+    """
+    Validators of a past event's details page, from the event and its
+    comments. An unknown event has none, so the view renders its 404.
+    """
+    changes = event_changes(pk)
+    if changes is None:
+        return None, None
+    return page_validators(req, ("details", pk), changes)
+
+
+async def adetails_validators(req, pk):
+    """Async version of details_validators."""
+    changes = await aevent_changes(pk)
+    if changes is None:
+        return None, None
+    return page_validators(req, ("details", pk), changes)
+
+
+def conditional_page(validators):
+    """
+    Decorator answering If-None-Match/If-Modified-Since with a 304
+    before the view renders anything, using ``validators(req, *args,
+    **kwargs)`` to compute the page's (ETag, Last-Modified). Async views
+    take async validators. Goes inside cache_anonymous_page, which
+    answers revalidations of cached pages from their stored ETag without
+    any query. The view can read the computed pair from
+    ``req.page_validators``.
+    Pages are marked no-cache, so browsers revalidate them on every
+    visit, back navigation included, instead of guessing a freshness
+    lifetime from Last-Modified.
+    """
+
+    def decorator(view):
+        def computed(req, *args, **kwargs):
+            if not hasattr(req, "page_validators"):
+                req.page_validators = validators(req, *args, **kwargs)
+            return req.page_validators
+
+        conditional_view = condition(
+            etag_func=lambda req, *args, **kwargs: computed(req, *args, **kwargs)[0],
+            last_modified_func=lambda req, *args, **kwargs: computed(
+                req, *args, **kwargs
+            )[1],
+        )(view)
+
+        if iscoroutinefunction(view):
+
+            @wraps(view)
+            async def async_wrapper(req, *args, **kwargs):
+                # condition() calls its functions synchronously, so the
+                # validators are computed before it runs.
+                if not hasattr(req, "page_validators"):
+                    req.page_validators = await validators(req, *args, **kwargs)
+                response = await conditional_view(req, *args, **kwargs)
+                patch_cache_control(response, no_cache=True)
+                return response
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(req, *args, **kwargs):
+            response = conditional_view(req, *args, **kwargs)
+            patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
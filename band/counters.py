@@ -0,0 +1,92 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .metrics import recorded_job
+from .models import Comments, Likes, PastEvent, UpcomingEvent
+from .versions import bump_version
+
+
+def _subquery_total(queryset, aggregate):
+    """
+    Wraps an aggregate over a related table as a correlated subquery
+    that evaluates to 0 when the event has no related rows.
+    """
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values("event")
+            .annotate(total=aggregate)
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+@recorded_job("reconcile-counters")
+def reconcile_counters():
+    """
+    Recomputes the denormalized engagement counters on events from the
+    Likes, Comments and upcoming-event likes tables and rewrites the rows
+    that have drifted, invalidating their cached fragments. Each table is
+    repaired with two queries: a SELECT of the ids of the drifted rows,
+    and a set-based UPDATE of those rows that recomputes their counters
+    with correlated subqueries. The number of queries does not depend on
+    the number of events.
+
+    Returns:
+        dict: The number of repaired rows per model label.
+    """
+    past_totals = {
+        "like_count": _subquery_total(
+            Likes.objects.filter(event=OuterRef("pk")), Count("pk")
+        ),
+        "comment_count": _subquery_total(
+            Comments.objects.filter(event=OuterRef("pk")), Count("pk")
+        ),
+        "rating_sum": _subquery_total(
+            Comments.objects.filter(event=OuterRef("pk")), Sum("rating")
+        ),
+    }
+    drifted = PastEvent.objects.alias(
+        **{f"actual_{name}": total for name, total in past_totals.items()}
+    ).filter(
+        ~Q(like_count=F("actual_like_count"))
+        | ~Q(comment_count=F("actual_comment_count"))
+        | ~Q(rating_sum=F("actual_rating_sum"))
+    )
+    drifted_past = list(drifted.values_list("pk", flat=True))
+    repaired_past = PastEvent.objects.filter(pk__in=drifted_past).update(
+        **past_totals, updated_at=timezone.now()
+    )
+
+    Through = UpcomingEvent.likes.through
+    upcoming_likes = Coalesce(
+        Subquery(
+            Through.objects.filter(upcomingevent=OuterRef("pk"))
+            .order_by()
+            .values("upcomingevent")
+            .annotate(total=Count("pk"))
+            .values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    drifted = UpcomingEvent.objects.alias(actual_like_count=upcoming_likes).exclude(
+        like_count=F("actual_like_count")
+    )
+    drifted_upcoming = list(drifted.values_list("pk", flat=True))
+    repaired_upcoming = UpcomingEvent.objects.filter(pk__in=drifted_upcoming).update(
+        like_count=upcoming_likes, updated_at=timezone.now()
+    )
+
+    for pk in drifted_past:
+        bump_version(PastEvent, pk)
+    for pk in drifted_upcoming:
+        bump_version(UpcomingEvent, pk)
+
+    return {
+        PastEvent._meta.label: repaired_past,
+        UpcomingEvent._meta.label: repaired_upcoming,
+    }
@@ -0,0 +1,60 @@
+from django.db import models
+from django.db.models.fields.files import ImageFieldFile
+from PIL import Image, UnidentifiedImageError
+
+from .thumbnails import displayed_size
+
+
+class StoredDimensionsImageFieldFile(ImageFieldFile):
+    """
+    Reads the dimensions of an image as it is displayed, i.e. with its
+    EXIF orientation applied like its resized copies, instead of the
+    stored sides Django's get_image_dimensions reports.
+    """
+
+    def _get_image_dimensions(self):
+        if not hasattr(self, "_dimensions_cache"):
+            close = self.closed
+            self.open()
+            position = self.tell()
+            self.seek(0)
+            try:
+                self._dimensions_cache = displayed_size(Image.open(self))
+            except UnidentifiedImageError:
+                # Not an image, as get_image_dimensions reports it.
+                self._dimensions_cache = (None, None)
+            finally:
+                if close:
+                    self.close()
+                else:
+                    self.seek(position)
+        return self._dimensions_cache
+
+
+class StoredDimensionsImageField(models.ImageField):
+    """
+    ImageField whose width/height fields are only read from the file
+    when a new file is assigned.
+
+    The stock field reopens the image every time a row whose dimension
+    fields are empty is loaded, which turns a listing page into one file
+    read per event and fails outright when the file is gone from
+    storage. Rows loaded from the database keep whatever dimensions are
+    stored (see the backfill_image_metadata command), and an unreadable
+    file leaves them empty.
+    """
+
+    attr_class = StoredDimensionsImageFieldFile
+
+    def update_dimension_fields(self, instance, force=False, *args, **kwargs):
+        if not force and self.attname in instance.__dict__:
+            file = getattr(instance, self.attname)
+            if file and file._committed:
+                return
+        try:
+            super().update_dimension_fields(instance, force, *args, **kwargs)
+        except OSError:
+            if self.width_field:
+                setattr(instance, self.width_field, None)
+            if self.height_field:
+                setattr(instance, self.height_field, None)
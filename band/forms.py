@@ -1,5 +1,6 @@
 from django import forms
 from datetime import datetime
+from .availability import is_date_free
 from .models import Comments, Bookings, UpcomingEvent, Likes
 from django.core.exceptions import ValidationError
 from django.contrib.auth.forms import UserCreationForm
@@ -219,6 +220,10 @@ class BookingsForm(forms.ModelForm):
         booking_date = self.cleaned_data.get("booking_date")
         if booking_date < timezone.now().date():
             raise ValidationError("Booking date cannot be in the past.")
+        if not is_date_free(booking_date):
+            raise ValidationError(
+                "The band is not available on this date. Please choose another date."
+            )
         return booking_date
 
 
@@ -0,0 +1,323 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Bookings, PastEvent, UpcomingEvent
+from .thumbnails import image_metadata, render_image
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Image field of each model with an image. Its companions are named after
+# it: <field>_derivatives, <field>_ready, <field>_placeholder,
+# <field>_width and <field>_height.
+IMAGE_FIELDS = {
+    PastEvent: "image",
+    UpcomingEvent: "image",
+    Bookings: "event_image",
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def stamped(model, changes):
+    """
+    Adds updated_at to the changes of an UPDATE on an event table, which
+    bypasses auto_now.
+    """
+    if model is not Bookings:
+        changes["updated_at"] = timezone.now()
+    return changes
+
+
+def _read(storage, name):
+    with storage.open(name, "rb") as original:
+        return original.read()
+
+
+def _render(storage, name):
+    """Renders a stored image, or returns None if it can't be read."""
+    try:
+        return render_image(_read(storage, name))
+    except FileNotFoundError:
+        logger.warning("Image %s is missing from storage", name)
+    except Exception:
+        logger.exception("Could not build derivatives of %s", name)
+    return None
+
+
+def store_derivatives(model, pk, source, rendered):
+    """
+    Saves rendered copies of an image next to it, stores its placeholder
+    and marks the row ready. The row is only updated if it still holds
+    the same image. The copies stay in storage either way: identical
+    images share their files, so another row may be using them. Events
+    are moved to a new render version so cached cards pick up the new
+    markup.
+
+    Args:
+        model: PastEvent, UpcomingEvent or Bookings.
+        pk: Primary key of the row.
+        source (str): Name of the image the copies were made from.
+        rendered (dict): Output of render_image. None marks the image
+        as processed without copies, so templates keep showing the
+        original.
+
+    Returns:
+        bool: True if the row was updated.
+    """
+    image_field = IMAGE_FIELDS[model]
+    storage = model._meta.get_field(image_field).storage
+    rendered = rendered or {"placeholder": "", "variants": []}
+    stem, _ = os.path.splitext(source)
+    variants = [
+        {
+            "format": variant["format"],
+            "width": variant["width"],
+            "height": variant["height"],
+            "name": storage.save(
+                f"{stem}_{variant['width']}w.{variant['extension']}",
+                ContentFile(variant["content"]),
+            ),
+        }
+        for variant in rendered["variants"]
+    ]
+    updated = model.objects.filter(pk=pk, **{image_field: source}).update(
+        **stamped(
+            model,
+            {
+                f"{image_field}_derivatives": {"source": source, "variants": variants},
+                f"{image_field}_placeholder": rendered["placeholder"],
+                f"{image_field}_ready": True,
+            },
+        )
+    )
+    if not updated:
+        return False
+    if model is not Bookings:
+        bump_version(model, pk)
+    return True
+
+
+def needs_derivatives(instance):
+    """
+    Tells whether an instance has an image whose derivatives are missing
+    or were made from a previous image.
+    """
+    image_field = IMAGE_FIELDS[type(instance)]
+    field_file = getattr(instance, image_field)
+    derivatives = getattr(instance, f"{image_field}_derivatives") or {}
+    return bool(field_file) and derivatives.get("source") != field_file.name
+
+
+def refresh_derivatives(instance, force=False):
+    """
+    Builds the derivatives of an instance's image in the calling thread
+    when they are missing or stale.
+
+    Args:
+        instance: A PastEvent, UpcomingEvent or Bookings instance.
+        force (bool): Rebuild even if the derivatives look current.
+
+    Returns:
+        bool: True if derivatives were stored.
+    """
+    if not (force or needs_derivatives(instance)):
+        return False
+    model = type(instance)
+    field_file = getattr(instance, IMAGE_FIELDS[model])
+    if not field_file:
+        return False
+    rendered = _render(field_file.storage, field_file.name)
+    return store_derivatives(model, instance.pk, field_file.name, rendered)
+
+
+def get_pool():
+    """
+    Returns the process pool that renders uploaded images, starting it
+    on first use with IMAGE_WORKERS processes (all cores when 0).
+    Workers are spawned rather than forked so they don't inherit the
+    web process's threads and database connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS or None,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _finish(model, pk, source, submitter, future):
+    try:
+        rendered = future.result()
+    except Exception:
+        logger.exception("Could not build derivatives of %s", source)
+        rendered = None
+    try:
+        store_derivatives(model, pk, source, rendered)
+    except Exception:
+        logger.exception("Could not store derivatives of %s", source)
+    finally:
+        # Callbacks normally run on the pool's management thread, whose
+        # connection nothing else would ever close.
+        if threading.get_ident() != submitter:
+            connection.close()
+
+
+def _submit(model, pk, source):
+    global _pool
+    storage = model._meta.get_field(IMAGE_FIELDS[model]).storage
+    try:
+        future = get_pool().submit(render_image, _read(storage, source))
+    except BrokenProcessPool:
+        logger.exception("Image pool died; %s is left for process_images", source)
+        with _pool_lock:
+            _pool = None
+        return
+    except FileNotFoundError:
+        logger.warning("Image %s is missing from storage", source)
+        store_derivatives(model, pk, source, None)
+        return
+    future.add_done_callback(partial(_finish, model, pk, source, threading.get_ident()))
+
+
+def schedule_derivatives(instance):
+    """
+    Arranges for the derivatives of a newly saved image to be built,
+    according to IMAGE_PROCESSING:
+
+        - "inline": right away, in the request thread.
+        - "pool": in a process pool of this web process, once the
+        transaction commits; the request returns without waiting.
+        - "worker": by the process_images command, which picks up every
+        row whose ready flag is cleared.
+
+    The ready flag is cleared first, so until the copies exist the
+    templates keep serving the original image.
+    """
+    if not needs_derivatives(instance):
+        return
+    model = type(instance)
+    image_field = IMAGE_FIELDS[model]
+    ready_field = f"{image_field}_ready"
+    if getattr(instance, ready_field):
+        setattr(instance, ready_field, False)
+        model.objects.filter(pk=instance.pk).update(**{ready_field: False})
+
+    mode = settings.IMAGE_PROCESSING
+    if mode == "inline":
+        refresh_derivatives(instance)
+    elif mode == "pool":
+        source = getattr(instance, image_field).name
+        transaction.on_commit(partial(_submit, model, instance.pk, source))
+
+
+def pending_images(model):
+    """
+    Returns the rows of a model with an image whose copies are still to
+    be built.
+    """
+    image_field = IMAGE_FIELDS[model]
+    return (
+        model.objects.filter(**{f"{image_field}_ready": False})
+        .exclude(**{image_field: ""})
+        .exclude(**{f"{image_field}__isnull": True})
+    )
+
+
+def process_pending(executor, batch_size=50):
+    """
+    Renders the images of up to ``batch_size`` rows per model whose
+    ready flag is cleared, spreading the work over ``executor``'s
+    processes, and stores the copies as each one finishes.
+
+    Returns:
+        int: Number of rows marked ready.
+    """
+    processed = 0
+    for model, image_field in IMAGE_FIELDS.items():
+        storage = model._meta.get_field(image_field).storage
+        pending = (
+            pending_images(model)
+            .order_by("pk")
+            .values_list("pk", image_field)[:batch_size]
+        )
+        futures = {}
+        for pk, source in pending:
+            try:
+                data = _read(storage, source)
+            except FileNotFoundError:
+                logger.warning("Image %s is missing from storage", source)
+                processed += store_derivatives(model, pk, source, None)
+                continue
+            futures[executor.submit(render_image, data)] = (pk, source)
+        for future in as_completed(futures):
+            pk, source = futures[future]
+            try:
+                rendered = future.result()
+            except Exception:
+                logger.exception("Could not build derivatives of %s", source)
+                rendered = None
+            processed += store_derivatives(model, pk, source, rendered)
+    return processed
+
+
+def backfill_metadata(force=False):
+    """
+    Fills in the width, height and placeholder of images uploaded before
+    they were recorded, so pages never have to open the files.
+
+    Args:
+        force (bool): Recompute them for every image, not only the ones
+        missing something.
+
+    Returns:
+        int: Number of rows updated.
+    """
+    updated = 0
+    for model, image_field in IMAGE_FIELDS.items():
+        storage = model._meta.get_field(image_field).storage
+        images = model.objects.exclude(**{image_field: ""}).exclude(
+            **{f"{image_field}__isnull": True}
+        )
+        if not force:
+            images = images.filter(
+                Q(**{f"{image_field}_width__isnull": True})
+                | Q(**{f"{image_field}_height__isnull": True})
+                | Q(**{f"{image_field}_placeholder": ""})
+            )
+        for pk, source in images.order_by("pk").values_list("pk", image_field):
+            try:
+                width, height, placeholder = image_metadata(_read(storage, source))
+            except FileNotFoundError:
+                logger.warning("Image %s is missing from storage", source)
+                continue
+            except Exception:
+                logger.exception("Could not read image %s", source)
+                continue
+            updated += model.objects.filter(pk=pk, **{image_field: source}).update(
+                **stamped(
+                    model,
+                    {
+                        f"{image_field}_width": width,
+                        f"{image_field}_height": height,
+                        f"{image_field}_placeholder": placeholder,
+                    },
+                )
+            )
+            if model is not Bookings:
+                bump_version(model, pk)
+    return updated
@@ -0,0 +1,246 @@
+"""
+Live like and comment counts, pushed to pages over Server-Sent Events.
+
+Each web process runs one hub while it has subscribers. The hub reads
+the counts of the events its subscribers watch and hands every
+subscriber the ones that changed, so the queries of a round depend on
+the events watched, not on how many clients are connected. Each client
+watches at most a page of events of each kind. A round runs at most once every
+LIVE_COUNTS_INTERVAL seconds, which coalesces a burst of likes into one
+message per client. Likes and comments made through this process wake
+the hub right away; changes made through other processes are picked up
+by a round every LIVE_COUNTS_POLL seconds.
+"""
+
+import asyncio
+import datetime
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import PastEvent, UpcomingEvent
+
+logger = logging.getLogger(__name__)
+
+# Event kinds, as named in the page's query string and messages.
+EVENT_MODELS = {"past": PastEvent, "upcoming": UpcomingEvent}
+COUNT_FIELDS = {
+    "past": ("like_count", "comment_count"),
+    "upcoming": ("like_count",),
+}
+
+# Events of each kind one client may watch: a page of the events page.
+MAX_WATCHED = 25
+# Event IDs per query, well under the bound-parameter limits of the
+# databases, however many clients the hub serves.
+READ_CHUNK = 500
+
+# Rows updated this long before a round started are read again, so a
+# transaction that committed late with an earlier updated_at is not
+# missed. Counts that didn't change are not sent.
+OVERLAP = datetime.timedelta(seconds=5)
+
+
+def _counts(row):
+    counts = {"likes": row[1]}
+    if len(row) > 2:
+        counts["comments"] = row[2]
+    return counts
+
+
+def parse_watched(query):
+    """
+    Reads the events a page watches from the "past" and "upcoming"
+    parameters of its query string.
+
+    Args:
+        query (QueryDict): The request's GET parameters.
+
+    Raises:
+        ValueError: If an ID is not an integer, or more than MAX_WATCHED
+        events of a kind are listed.
+
+    Returns:
+        dict: {kind: set of event IDs}.
+    """
+    watched = {}
+    for kind in EVENT_MODELS:
+        values = query.getlist(kind)
+        if not all(value.isascii() and value.isdigit() for value in values):
+            raise ValueError(f'"{kind}" takes event IDs.')
+        watched[kind] = {int(value) for value in values}
+        if len(watched[kind]) > MAX_WATCHED:
+            raise ValueError(f'"{kind}" takes at most {MAX_WATCHED} event IDs.')
+    return watched
+
+
+async def read_counts(watched, since=None):
+    """
+    Reads the counts of the watched events, optionally only of those
+    updated since a given time, READ_CHUNK events per query.
+
+    Args:
+        watched (dict): {kind: set of event IDs}.
+        since (datetime, optional): Skip events not updated since then.
+
+    Returns:
+        dict: {kind: {event ID: {"likes": int, "comments": int}}};
+        upcoming events have no comments.
+    """
+    counts = {}
+    for kind, ids in watched.items():
+        ids = sorted(ids)
+        for start in range(0, len(ids), READ_CHUNK):
+            queryset = EVENT_MODELS[kind].objects.filter(
+                pk__in=ids[start : start + READ_CHUNK]
+            )
+            if since is not None:
+                queryset = queryset.filter(updated_at__gte=since)
+            rows = queryset.values_list("pk", *COUNT_FIELDS[kind])
+            found = counts.setdefault(kind, {})
+            found.update({row[0]: _counts(row) async for row in rows})
+    return counts
+
+
+class Subscription:
+    """
+    One client's view of the hub: the events it watches and the changes
+    waiting to be sent to it, newest counts only.
+    """
+
+    def __init__(self, watched):
+        self.watched = watched
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def deliver(self, counts):
+        for kind, events in counts.items():
+            mine = {
+                pk: value for pk, value in events.items() if pk in self.watched[kind]
+            }
+            if mine:
+                self.pending.setdefault(kind, {}).update(mine)
+        if self.pending:
+            self.ready.set()
+
+    async def changes(self, timeout):
+        """
+        Waits up to timeout seconds for changes.
+
+        Returns:
+            dict: The changed counts, as read_counts returns them, or
+            an empty dict on timeout.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except TimeoutError:
+            return {}
+        self.ready.clear()
+        changes, self.pending = self.pending, {}
+        return changes
+
+
+class CountsHub:
+    """
+    Per-process fan-out of count changes to the subscriptions of the
+    event loop serving them. See the module docstring.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.task = None
+        self.wake = None
+        self.subscriptions = set()
+        self.known = {}
+
+    def subscribe(self, watched):
+        """
+        Registers a client watching some events, starting the hub's
+        rounds if needed. Must be called from the event loop.
+
+        Args:
+            watched (dict): {kind: set of event IDs}.
+
+        Returns:
+            Subscription: To be passed to unsubscribe() when done.
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First client, or the previous loop has gone away.
+            self.loop = loop
+            self.wake = asyncio.Event()
+            self.task = None
+            self.subscriptions = set()
+        subscription = Subscription(watched)
+        self.subscriptions.add(subscription)
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscriptions.discard(subscription)
+
+    def notify(self):
+        """
+        Wakes the hub after a count changed in this process. Safe to
+        call from any thread, and a no-op without subscribers.
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.subscriptions:
+            return
+        loop.call_soon_threadsafe(self.wake.set)
+
+    def _watched(self):
+        watched = {kind: set() for kind in EVENT_MODELS}
+        for subscription in self.subscriptions:
+            for kind, ids in subscription.watched.items():
+                watched[kind] |= ids
+        return watched
+
+    async def _round(self, since):
+        counts = await read_counts(self._watched(), since)
+        changed = {}
+        for kind, events in counts.items():
+            for pk, value in events.items():
+                if self.known.get((kind, pk)) != value:
+                    self.known[(kind, pk)] = value
+                    changed.setdefault(kind, {})[pk] = value
+        if changed:
+            for subscription in list(self.subscriptions):
+                subscription.deliver(changed)
+
+    async def _run(self):
+        since = timezone.now()
+        while self.subscriptions:
+            try:
+                await asyncio.wait_for(self.wake.wait(), settings.LIVE_COUNTS_POLL)
+            except TimeoutError:
+                pass
+            self.wake.clear()
+            started = timezone.now()
+            try:
+                await self._round(since - OVERLAP)
+            except Exception:
+                logger.exception("Reading live counts failed")
+            finally:
+                # The hub outlives any request, so nothing else would
+                # give its connection back between rounds.
+                await sync_to_async(close_old_connections)()
+            since = started
+            # Coalesce: nothing goes out more often than this.
+            await asyncio.sleep(settings.LIVE_COUNTS_INTERVAL)
+        self.known.clear()
+
+
+hub = CountsHub()
+
+
+def counts_changed():
+    """
+    Tells the hub that a like or comment count changed, once the
+    current transaction commits.
+    """
+    transaction.on_commit(hub.notify)
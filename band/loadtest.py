@@ -0,0 +1,112 @@
+"""
+Slow-client load test for comparing server setups.
+
+Many simulated slow clients each open a connection, send their request
+line and then stall for a while before finishing the headers, the way
+clients on poor mobile links do. Meanwhile ordinary requests are sent
+at regular intervals and timed. A server with one thread or process per
+connection is tied up by the slow clients, so the ordinary requests
+queue behind them; an event loop server keeps answering.
+"""
+
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _request(host, port, target, stall, timeout, delay):
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(host, port), timeout
+    )
+    try:
+        writer.write(f"GET {target} HTTP/1.1\r\n".encode("latin-1"))
+        await writer.drain()
+        if stall:
+            await asyncio.sleep(stall)
+        writer.write(
+            f"Host: {host}:{port}\r\nUser-Agent: band-loadtest\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return int(status_line.split()[1]), time.perf_counter() - start
+
+
+def _durations(results):
+    return sorted(
+        result[1]
+        for result in results
+        if not isinstance(result, BaseException) and result[0] < 500
+    )
+
+
+def _percentile(values, percent):
+    index = max(0, round(len(values) * percent / 100) - 1)
+    return values[index]
+
+
+async def _run(url, slow_clients, stall, probes, timeout):
+    parts = urlsplit(url)
+    host = parts.hostname
+    port = parts.port or 80
+    target = parts.path or "/"
+    if parts.query:
+        target += f"?{parts.query}"
+
+    start = time.perf_counter()
+    slow = [
+        _request(host, port, target, stall, timeout, 0) for _ in range(slow_clients)
+    ]
+    # Probes start once the slow clients are connected and are spread
+    # over the time they stall.
+    probe = [
+        _request(host, port, target, 0, timeout, 1 + index * stall / probes)
+        for index in range(probes)
+    ]
+    results = await asyncio.gather(*slow, *probe, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    slow_ok = len(_durations(results[:slow_clients]))
+    probe_durations = _durations(results[slow_clients:])
+    stats = {
+        "slow_clients": slow_clients,
+        "slow_ok": slow_ok,
+        "probes": probes,
+        "probes_ok": len(probe_durations),
+        "elapsed": elapsed,
+    }
+    if probe_durations:
+        stats.update(
+            p50=statistics.median(probe_durations),
+            p95=_percentile(probe_durations, 95),
+            max=probe_durations[-1],
+        )
+    return stats
+
+
+def run_loadtest(url, slow_clients=1000, stall=10.0, probes=50, timeout=60.0):
+    """
+    Connects ``slow_clients`` stalling clients to a running server and
+    times ``probes`` ordinary requests sent while they stall.
+
+    Args:
+        url (str): An http:// URL of the page to request.
+        slow_clients (int): Number of slow connections held open.
+        stall (float): Seconds each slow client waits between its
+        request line and the rest of its headers.
+        probes (int): Number of ordinary requests to time.
+        timeout (float): Seconds after which a request counts as
+        failed.
+
+    Returns:
+        dict: "slow_clients", "slow_ok", "probes", "probes_ok" and
+        "elapsed" seconds, plus the "p50", "p95" and "max" response
+        times in seconds of the successful probes.
+    """
+    return asyncio.run(_run(url, slow_clients, stall, probes, timeout))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from band.archival import archive_expired_events
+
+
+class Command(BaseCommand):
+    help = "Moves upcoming events that have already taken place into past events."
+
+    def handle(self, *args, **options):
+        archived = archive_expired_events()
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} event(s)."))
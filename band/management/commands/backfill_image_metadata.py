@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from band.images import backfill_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Records the width, height and placeholder of images uploaded "
+        "before they were stored on the rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompute them for every image, not only incomplete ones.",
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_metadata(force=options["force"])
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} image(s)."))
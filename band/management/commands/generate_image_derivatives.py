@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from band.images import IMAGE_FIELDS, refresh_derivatives
+
+
+class Command(BaseCommand):
+    help = "Builds the resized copies of event and booking images that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild the copies of every image, even current ones.",
+        )
+
+    def handle(self, *args, **options):
+        for model, image_field in IMAGE_FIELDS.items():
+            images = (
+                model.objects.exclude(**{image_field: ""})
+                .exclude(**{f"{image_field}__isnull": True})
+                .order_by("pk")
+            )
+            built = sum(
+                refresh_derivatives(instance, force=options["force"])
+                for instance in images.iterator()
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"{model._meta.label}: built {built} image(s).")
+            )
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+
+from band.loadtest import run_loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Holds many slow connections open against a running server and "
+        "times ordinary requests sent meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", help="Page to request, e.g. http://127.0.0.1:8000/events."
+        )
+        parser.add_argument(
+            "--slow-clients",
+            type=int,
+            default=1000,
+            help="Number of slow connections.",
+        )
+        parser.add_argument(
+            "--stall",
+            type=float,
+            default=10.0,
+            help="Seconds each slow client stalls in the middle of its request.",
+        )
+        parser.add_argument(
+            "--probes",
+            type=int,
+            default=50,
+            help="Number of ordinary requests to time.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60.0,
+            help="Seconds after which a request counts as failed.",
+        )
+
+    def handle(self, *args, **options):
+        stats = run_loadtest(
+            options["url"],
+            options["slow_clients"],
+            options["stall"],
+            options["probes"],
+            options["timeout"],
+        )
+        self.stdout.write(
+            f"{stats['slow_ok']}/{stats['slow_clients']} slow clients and "
+            f"{stats['probes_ok']}/{stats['probes']} probes answered "
+            f"in {stats['elapsed']:.2f}s."
+        )
+        if stats["probes_ok"]:
+            self.stdout.write(
+                "Probe response times: "
+                + ", ".join(
+                    f"{name} {stats[name]:.2f}s" for name in ("p50", "p95", "max")
+                )
+            )
@@ -0,0 +1,58 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from band.images import process_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the resized copies of uploaded images that are waiting "
+        "for them, using one process per CPU core."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.IMAGE_WORKERS,
+            help="Number of processes (default: IMAGE_WORKERS, 0 for all cores).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Rows of each model fetched per pass.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and poll for new uploads.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when nothing is pending.",
+        )
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(
+            max_workers=options["workers"] or None,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            while True:
+                processed = process_pending(executor, options["batch_size"])
+                close_old_connections()
+                if processed:
+                    self.stdout.write(
+                        self.style.SUCCESS(f"Processed {processed} image(s).")
+                    )
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from band.retention import RETENTION_POLICIES, purge_expired_bookings
+
+
+class Command(BaseCommand):
+    help = "Deletes or archives bookings whose date has passed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--policy",
+            choices=RETENTION_POLICIES,
+            help="Overrides the BOOKING_RETENTION_POLICY setting.",
+        )
+
+    def handle(self, *args, **options):
+        removed = purge_expired_bookings(policy=options["policy"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired booking(s)."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from band.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Repairs drift in the like, comment and rating counters stored on events."
+
+    def handle(self, *args, **options):
+        for label, repaired in reconcile_counters().items():
+            self.stdout.write(
+                self.style.SUCCESS(f"{label}: repaired {repaired} row(s).")
+            )
@@ -0,0 +1,25 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from band.media import rehash_media
+
+
+class Command(BaseCommand):
+    help = (
+        "Renames uploaded images to the hash of their contents, merging "
+        "duplicates, and updates the rows that use them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the files under their old names afterwards.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            rehashed = rehash_media(delete=options["delete"])
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(f"Rehashed {rehashed} file(s)."))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from band.sqlitebench import PROFILES, run_sqlite_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Toggles likes from several processes at once on a throwaway SQLite "
+        "database, with the default and the tuned SQLite settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of writing processes.",
+        )
+        parser.add_argument(
+            "--writes",
+            type=int,
+            default=200,
+            help="Likes toggled by each process.",
+        )
+        parser.add_argument(
+            "--profile",
+            choices=sorted(PROFILES),
+            action="append",
+            help="Settings to benchmark; both by default.",
+        )
+
+    def handle(self, *args, **options):
+        for profile in options["profile"] or PROFILES:
+            stats = run_sqlite_benchmark(profile, options["workers"], options["writes"])
+            self.stdout.write(
+                f"{profile}: {stats['ok']}/{stats['writes']} writes, "
+                f"{stats['errors']} \"database is locked\", "
+                f"{stats['throughput']:.0f} writes/s"
+            )
+            if stats["ok"]:
+                self.stdout.write(
+                    "  Write times: "
+                    + ", ".join(
+                        f"{name} {stats[name] * 1000:.1f}ms"
+                        for name in ("p50", "p95", "max")
+                    )
+                )
@@ -0,0 +1,220 @@
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import storages
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .images import IMAGE_FIELDS, stamped
+from .models import BookingHistory, Bookings
+from .storage import ContentAddressedStorage, is_content_addressed
+from .streaming import is_async_request, stream_body
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+# A year, the longest lifetime caches honour.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Files under upload names may be replaced by rehash_media.
+MEDIA_MAX_AGE = 24 * 60 * 60
+
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+CHUNK_SIZE = 64 * 1024
+
+
+def _byte_range(header, size):
+    """
+    Parses a Range header asking for a single range of a ``size`` bytes
+    file. Returns the (first, last) byte offsets, None to send the whole
+    file (malformed or multi-range headers), or False if the range lies
+    past the end of the file.
+    """
+    match = RANGE.fullmatch(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # "bytes=-N" asks for the last N bytes.
+        if int(last) == 0:
+            return False
+        return max(0, size - int(last)), size - 1
+    if int(first) >= size:
+        return False
+    last = min(int(last), size - 1) if last else size - 1
+    if last < int(first):
+        return None
+    return int(first), last
+
+
+def _read_range(path, first, last):
+    with open(path, "rb") as file:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(req, path):
+    """
+    Serves an uploaded file from MEDIA_ROOT with an ETag and
+    Last-Modified for conditional requests, and single byte ranges for
+    resumed downloads and media players. Whole files go out through the
+    WSGI server's file wrapper (sendfile where available), or in chunks
+    under ASGI.
+    Files named after the hash of their contents never change, so
+    browsers and proxies are told to keep them for a year without
+    revalidating, and the hash doubles as their ETag.
+
+    Args:
+        req (_type_): the Function takes a request object
+        path (str): The file's name in storage.
+
+    Returns:
+        _type_: The file or part of it, or a 304/404/412/416 response.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404("No such file.")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("No such file.")
+
+    size = stat_result.st_size
+    if is_content_addressed(path):
+        digest, _ = posixpath.splitext(posixpath.basename(path))
+        etag = f'"{digest}"'
+        cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+        cache_control = f"public, max-age={MEDIA_MAX_AGE}"
+    last_modified = int(stat_result.st_mtime)
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    response = get_conditional_response(req, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        # A range only applies to the version the client already has.
+        if "HTTP_RANGE" in req.META and req.META.get("HTTP_IF_RANGE", etag) == etag:
+            byte_range = _byte_range(req.META["HTTP_RANGE"], size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                stream_body(req, _read_range(full_path, first, last)),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+            response["Content-Length"] = last - first + 1
+        elif is_async_request(req):
+            # ASGI servers have no file wrapper, and a FileResponse would
+            # be read into memory whole.
+            response = StreamingHttpResponse(
+                stream_body(req, _read_range(full_path, 0, size - 1)),
+                content_type=content_type,
+            )
+            response["Content-Length"] = size
+        else:
+            response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = cache_control
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _rehash(storage, name, renamed):
+    if not name or is_content_addressed(name):
+        return name
+    if name not in renamed:
+        with storage.open(name, "rb") as original:
+            renamed[name] = storage.save(name, File(original, name))
+    return renamed[name]
+
+
+def _rehash_derivatives(storage, derivatives, old_source, new_source, renamed):
+    if not derivatives or derivatives.get("source") != old_source:
+        # Copies of a previous image; they'll be rebuilt anyway.
+        return derivatives
+    variants = []
+    for variant in derivatives.get("variants", []):
+        try:
+            variants.append(
+                {**variant, "name": _rehash(storage, variant["name"], renamed)}
+            )
+        except FileNotFoundError:
+            logger.warning("Image %s is missing from storage", variant["name"])
+    return {**derivatives, "source": new_source, "variants": variants}
+
+
+def rehash_media(delete=False):
+    """
+    Moves images stored under their upload names to content-addressed
+    names, along with their resized copies, and points the rows at them.
+    Identical files end up stored once. Files missing from storage are
+    left as they are.
+
+    Args:
+        delete (bool): Delete the old files afterwards.
+
+    Returns:
+        int: Number of files rehashed.
+    """
+    storage = storages["default"]
+    if not isinstance(storage, ContentAddressedStorage):
+        raise ImproperlyConfigured(
+            "The default storage is not a ContentAddressedStorage."
+        )
+
+    renamed = {}
+    tables = [
+        (model, image_field, f"{image_field}_derivatives")
+        for model, image_field in IMAGE_FIELDS.items()
+    ] + [(BookingHistory, "event_image", None)]
+    for model, image_field, derivatives_field in tables:
+        fields = ["pk", image_field] + (
+            [derivatives_field] if derivatives_field else []
+        )
+        for pk, name, *derivatives in model.objects.values_list(*fields).iterator():
+            try:
+                new_name = _rehash(storage, name, renamed)
+            except FileNotFoundError:
+                logger.warning("Image %s is missing from storage", name)
+                continue
+            changes = {image_field: new_name}
+            if derivatives_field:
+                changes[derivatives_field] = _rehash_derivatives(
+                    storage, derivatives[0], name, new_name, renamed
+                )
+                if changes[derivatives_field] == derivatives[0]:
+                    del changes[derivatives_field]
+            if new_name == name and len(changes) == 1:
+                continue
+            if derivatives_field:
+                stamped(model, changes)
+            model.objects.filter(pk=pk, **{image_field: name}).update(**changes)
+            if derivatives_field and model is not Bookings:
+                bump_version(model, pk)
+
+    if delete:
+        for name in renamed:
+            storage.delete(name)
+    return len(renamed)
@@ -0,0 +1,195 @@
+"""
+Prometheus metrics, served at /metrics.
+
+Request latency per URL name, database queries, band cache reads and
+the runs of the periodic jobs are counted where they happen. The depth
+of the image queue is read from the database when the metrics are
+scraped.
+
+Under gunicorn every worker process counts for itself. When
+PROMETHEUS_MULTIPROC_DIR is set, which gunicorn.conf.py does for the
+web server, the processes write their values to files in that
+directory and a scrape of any worker adds them all up. The directory
+must be emptied before the server starts.
+"""
+
+import functools
+import os
+import time
+
+from django.db import DatabaseError
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+REQUEST_DURATION = Histogram(
+    "band_request_duration_seconds",
+    "Time taken to answer requests, by URL name.",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "band_requests",
+    "Requests answered, by URL name and status code.",
+    ["view", "method", "status"],
+)
+DB_QUERIES = Counter("band_db_queries", "SQL statements run.")
+CACHE_READS = Counter(
+    "band_cache_reads",
+    "Reads of the band caches, by namespace and whether they hit.",
+    ["namespace", "result"],
+)
+JOB_RUNS = Counter(
+    "band_job_runs",
+    "Runs of the periodic jobs, by outcome.",
+    ["job", "outcome"],
+)
+JOB_ITEMS = Counter(
+    "band_job_items",
+    "Rows handled by the periodic jobs: events archived, bookings purged,"
+    " counters repaired.",
+    ["job"],
+)
+JOB_DURATION = Histogram(
+    "band_job_duration_seconds",
+    "Time taken by the runs of the periodic jobs, failed ones included.",
+    ["job"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+JOB_LAST_SUCCESS = Gauge(
+    "band_job_last_success_timestamp_seconds",
+    "When each periodic job last ran without errors.",
+    ["job"],
+    multiprocess_mode="max",
+)
+
+# Requests that never reached a view, e.g. static files or 404s.
+UNMATCHED = "unmatched"
+
+
+def observe_request(req, response, duration):
+    """Counts an answered request and its duration in seconds."""
+    match = getattr(req, "resolver_match", None)
+    view = match.view_name if match else UNMATCHED
+    REQUEST_DURATION.labels(view, req.method).observe(duration)
+    REQUESTS.labels(view, req.method, response.status_code).inc()
+
+
+def record_job(job, result=None, failed=False, duration=None):
+    """
+    Counts a run of a periodic job.
+
+    Args:
+        job (str): The job's name.
+        result (int or dict, optional): Rows the job handled, or a count
+        of them per model.
+        failed (bool): Whether the run raised.
+        duration (float, optional): How long the run took, in seconds.
+    """
+    if duration is not None:
+        JOB_DURATION.labels(job).observe(duration)
+    if failed:
+        JOB_RUNS.labels(job, "failure").inc()
+        return
+    JOB_RUNS.labels(job, "success").inc()
+    if isinstance(result, dict):
+        result = sum(result.values())
+    if isinstance(result, int):
+        JOB_ITEMS.labels(job).inc(result)
+    JOB_LAST_SUCCESS.labels(job).set(time.time())
+
+
+def recorded_job(job):
+    """
+    Decorator counting and timing every run of a job function with
+    record_job, whoever calls it: the in-process scheduler or a
+    management command run by cron. A run that raises is counted as a
+    failure and the exception propagates.
+
+    Args:
+        job (str): The job's name in the metrics.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                record_job(job, failed=True, duration=time.perf_counter() - start)
+                raise
+            record_job(job, result, duration=time.perf_counter() - start)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class ImageQueueCollector:
+    """
+    Reports the uploaded images whose copies are still to be built, per
+    model, as counted in the database when scraped.
+    """
+
+    def describe(self):
+        # Lets the registry know the metric's name without querying.
+        return [self._family()]
+
+    def _family(self):
+        return GaugeMetricFamily(
+            "band_image_queue_depth",
+            "Uploaded images whose resized copies are still to be built.",
+            labels=["model"],
+        )
+
+    def collect(self):
+        from .images import IMAGE_FIELDS, pending_images
+
+        family = self._family()
+        try:
+            for model in IMAGE_FIELDS:
+                count = pending_images(model).count()
+                family.add_metric([model._meta.model_name], count)
+        except DatabaseError:
+            # The other metrics are still worth scraping; /readyz reports
+            # the database.
+            return
+        yield family
+
+
+image_queue = ImageQueueCollector()
+
+
+def _multiprocess():
+    return "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+
+if not _multiprocess():
+    REGISTRY.register(image_queue)
+
+
+def exposition():
+    """
+    Renders every metric, added up over the worker processes in
+    multiprocess mode.
+
+    Returns:
+        tuple: The body and its content type.
+    """
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(image_queue)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,153 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import performance, replicas
+from .metrics import observe_request
+from .streaming import aiterate
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_chunks(file):
+    with file:
+        while chunk := file.read(CHUNK_SIZE):
+            yield chunk
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware that also runs natively under ASGI.
+
+    WhiteNoise's middleware is sync only, and a single sync middleware
+    makes Django run the whole request, async views included, in a
+    thread. Under ASGI this one looks the file up directly and streams
+    it from a worker thread chunk by chunk; non-static requests go on to
+    the rest of the stack without leaving the event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = await sync_to_async(static_file.get_response)(
+            request.method, request.META
+        )
+        if response.file is None:
+            http_response = HttpResponse(status=int(response.status))
+        else:
+            http_response = StreamingHttpResponse(
+                aiterate(_read_chunks(response.file)), status=int(response.status)
+            )
+        del http_response["Content-Type"]
+        for key, value in response.headers:
+            http_response[key] = value
+        return http_response
+
+
+class ReadYourWritesMiddleware:
+    """
+    Keeps track of where each request's reads go, and keeps visitors
+    who just wrote something off the replicas; see band.replicas.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = replicas.start_request(request)
+        response = self.get_response(request)
+        return replicas.finish_request(token, response)
+
+    async def __acall__(self, request):
+        token = replicas.start_request(request)
+        response = await self.get_response(request)
+        return replicas.finish_request(token, response)
+
+
+class PerformanceMiddleware:
+    """
+    Measures a sample of the requests and reports their SQL, template
+    and cache use in a Server-Timing header and a log line; see
+    band.performance. Goes first, so its total covers the other
+    middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = performance.start_request(request)
+        response = self.get_response(request)
+        return performance.finish_request(token, request, response)
+
+    async def __acall__(self, request):
+        token = performance.start_request(request)
+        response = await self.get_response(request)
+        return performance.finish_request(token, request, response)
+
+
+class MetricsMiddleware:
+    """
+    Counts every request and its duration per URL name for the
+    Prometheus metrics; see band.metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start)
+        return response
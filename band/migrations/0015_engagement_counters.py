@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 07:07
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def _total(queryset, group_by, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_by).annotate(total=aggregate).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    PastEvent = apps.get_model("band", "PastEvent")
+    UpcomingEvent = apps.get_model("band", "UpcomingEvent")
+    Likes = apps.get_model("band", "Likes")
+    Comments = apps.get_model("band", "Comments")
+    comments = Comments.objects.filter(event=OuterRef("pk"))
+    PastEvent.objects.update(
+        like_count=_total(Likes.objects.filter(event=OuterRef("pk")), "event", Count("pk")),
+        comment_count=_total(comments, "event", Count("pk")),
+        rating_sum=_total(comments, "event", Sum("rating")),
+    )
+    Through = UpcomingEvent.likes.through
+    UpcomingEvent.objects.update(
+        like_count=_total(
+            Through.objects.filter(upcomingevent=OuterRef("pk")), "upcomingevent", Count("pk")
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('band', '0014_alter_pastevent_description_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pastevent',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pastevent',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='pastevent',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='upcomingevent',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
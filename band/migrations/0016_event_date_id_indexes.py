@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 07:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('band', '0015_engagement_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pastevent',
+            index=models.Index(fields=['date', 'id'], name='band_pastevent_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='upcomingevent',
+            index=models.Index(fields=['date', 'id'], name='band_upcomingevent_date_id'),
+        ),
+    ]
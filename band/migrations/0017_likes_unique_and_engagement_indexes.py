@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-18 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Min
+
+
+def remove_duplicate_likes(apps, schema_editor):
+    """Keep the oldest like per (user, event) so the unique constraint applies."""
+    Likes = apps.get_model("band", "Likes")
+    PastEvent = apps.get_model("band", "PastEvent")
+    duplicates = (
+        Likes.objects.values("user", "event")
+        .annotate(keep=Min("pk"), total=Count("pk"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        Likes.objects.filter(user=row["user"], event=row["event"]).exclude(
+            pk=row["keep"]
+        ).delete()
+        PastEvent.objects.filter(pk=row["event"], like_count__gte=row["total"] - 1).update(
+            like_count=F("like_count") - (row["total"] - 1)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('band', '0016_event_date_id_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_likes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bookings',
+            index=models.Index(fields=['user', 'booking_date'], name='band_bookings_user_date'),
+        ),
+        migrations.AddIndex(
+            model_name='comments',
+            index=models.Index(fields=['event', 'date'], name='band_comments_event_date'),
+        ),
+        migrations.AddConstraint(
+            model_name='likes',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='band_likes_unique_user_event'),
+        ),
+    ]
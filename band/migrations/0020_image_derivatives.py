@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("band", "0019_bookinghistory"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookings",
+            name="event_image_derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="image_derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="image_derivatives",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+def mark_ready(apps, schema_editor):
+    for model_name, image_field in (
+        ("PastEvent", "image"),
+        ("UpcomingEvent", "image"),
+        ("Bookings", "event_image"),
+    ):
+        model = apps.get_model("band", model_name)
+        ready = [
+            pk
+            for pk, name, derivatives in model.objects.values_list(
+                "pk", image_field, f"{image_field}_derivatives"
+            ).iterator()
+            if name and (derivatives or {}).get("source") == name
+        ]
+        model.objects.filter(pk__in=ready).update(**{f"{image_field}_ready": True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("band", "0020_image_derivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookings",
+            name="event_image_ready",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="image_ready",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="image_ready",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2 on 2026-10-18 07:23
+
+import band.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("band", "0021_image_ready"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookings",
+            name="event_image_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="bookings",
+            name="event_image_placeholder",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="bookings",
+            name="event_image_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="image_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="image_placeholder",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="image_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="image_height",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="image_placeholder",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="image_width",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name="bookings",
+            name="event_image",
+            field=band.fields.StoredDimensionsImageField(
+                blank=True,
+                height_field="event_image_height",
+                null=True,
+                upload_to="event_images/",
+                width_field="event_image_width",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pastevent",
+            name="image",
+            field=band.fields.StoredDimensionsImageField(
+                blank=True,
+                height_field="image_height",
+                null=True,
+                upload_to="event_images/",
+                width_field="image_width",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="upcomingevent",
+            name="image",
+            field=band.fields.StoredDimensionsImageField(
+                blank=True,
+                height_field="image_height",
+                null=True,
+                upload_to="event_images/",
+                width_field="image_width",
+            ),
+        ),
+    ]
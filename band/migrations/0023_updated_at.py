@@ -0,0 +1,51 @@
+# Generated by Django 5.2 on 2026-10-18 07:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("band", "0022_image_dimensions_placeholders"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comments",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="likes",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="pastevent",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="upcomingevent",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="comments",
+            index=models.Index(
+                fields=["event", "updated_at"], name="band_comments_event_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pastevent",
+            index=models.Index(fields=["updated_at"], name="band_pastevent_updated"),
+        ),
+        migrations.AddIndex(
+            model_name="upcomingevent",
+            index=models.Index(
+                fields=["updated_at"], name="band_upcomingevent_updated"
+            ),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+from .fields import StoredDimensionsImageField
+
 
 # Create your models here.
 class BaseEvent(models.Model):
@@ -13,22 +15,55 @@ class BaseEvent(models.Model):
         - date: Date on which the event takes place.
         - location: Venue or place where the event is held.
         - image: Optional image representing the event.
+        - image_derivatives: Resized copies of the image, as built by
+        band.images.store_derivatives.
+        - image_ready: Whether image_derivatives match the current image.
+        Cleared when a new image is saved and set once its copies exist.
+        - image_width, image_height: Pixel size of the image, filled in
+        when it is uploaded.
+        - image_placeholder: Tiny blurred preview of the image as a
+        data: URI, shown in its place while it loads.
+        - like_count: Denormalized number of likes, kept in step with
+        the likes by the views and repaired by the reconcile_counters
+        command.
+        - updated_at: When the event last changed, its counters
+        included. Bulk .update() calls must set it too, since they
+        bypass auto_now. Validates conditional GETs of event pages.
 
     Notes:
         - This model is marked as abstract, meaning it will not create
         its own database table.
         - Intended to be inherited by concrete models like PastEvent
-        and UpcomingEvent.
+        and UpcomingEvent, which also inherit its (date, id) index.
     """
 
     name = models.CharField(max_length=100)
     description = models.TextField(null=True, blank=True)
     date = models.DateField()
     location = models.CharField(max_length=100)
-    image = models.ImageField(upload_to="event_images/", null=True, blank=True)
+    image = StoredDimensionsImageField(
+        upload_to="event_images/",
+        null=True,
+        blank=True,
+        width_field="image_width",
+        height_field="image_height",
+    )
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_placeholder = models.TextField(blank=True, default="", editable=False)
+    image_derivatives = models.JSONField(default=dict, blank=True)
+    image_ready = models.BooleanField(default=False)
+    like_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
+        indexes = [
+            # Backs the (date, id) keyset pagination of event listings.
+            models.Index(fields=["date", "id"], name="%(app_label)s_%(class)s_date_id"),
+            # Lets the newest change be read without scanning the table.
+            models.Index(fields=["updated_at"], name="%(app_label)s_%(class)s_updated"),
+        ]
 
     def __str__(self):
         """
@@ -41,12 +76,14 @@ class PastEvent(BaseEvent):
     """
     Model for past events.
 
-    Inherits all fields from BaseEvent.
-    Does not add any additional fields or methods.
+    Inherits all fields from BaseEvent and adds:
+        - comment_count: Denormalized number of comments.
+        - rating_sum: Denormalized sum of all comment ratings.
     Used for events that have already occurred.
     """
 
-    pass
+    comment_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
 
 
 class UpcomingEvent(BaseEvent):
@@ -74,6 +111,7 @@ class Comments(models.Model):
         - rating: Numerical rating (e.g., 1–5) given to the event.
         - date: Date when the comment was created (auto-filled).
         - time: Time when the comment was created (auto-filled).
+        - updated_at: When the comment last changed.
     """
 
     user = models.ForeignKey(
@@ -86,6 +124,16 @@ class Comments(models.Model):
     rating = models.IntegerField()
     date = models.DateField(auto_now_add=True, null=True, blank=True)
     time = models.TimeField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "date"], name="band_comments_event_date"),
+            # Backs the newest-change lookup of an event's comments.
+            models.Index(
+                fields=["event", "updated_at"], name="band_comments_event_updated"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -107,12 +155,23 @@ class Likes(models.Model):
     Fields:
         - event: ForeignKey to the PastEvent that is liked.
         - user: ForeignKey to the User who liked the event.
+        - updated_at: When the like was last saved.
+
+    A user can like an event at most once; the database enforces it.
     """
 
     event = models.ForeignKey(PastEvent, related_name="likes", on_delete=models.CASCADE)
     user = models.ForeignKey(
         User, related_name="likes", on_delete=models.CASCADE, null=True, blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "event"], name="band_likes_unique_user_event"
+            ),
+        ]
 
     def __str__(self):
         """
@@ -132,6 +191,12 @@ class Bookings(models.Model):
         - description: Additional details or notes for the booking.
         - location: Location of the booked event.
         - event_image: Optional image of the event being booked.
+        - event_image_derivatives: Resized copies of the image, as built
+        by band.images.store_derivatives.
+        - event_image_ready: Whether event_image_derivatives match the
+        current image.
+        - event_image_width, event_image_height, event_image_placeholder:
+        Pixel size and blurred preview of the image, as on BaseEvent.
         - booking_date: Date of the booking.
         - band_response: Text field storing response from the event
         band/organizer (default = "Pending").
@@ -143,10 +208,34 @@ class Bookings(models.Model):
     )
     description = models.TextField(null=True, blank=True)
     location = models.CharField(max_length=100, null=True, blank=True)
-    event_image = models.ImageField(upload_to="event_images/", null=True, blank=True)
+    event_image = StoredDimensionsImageField(
+        upload_to="event_images/",
+        null=True,
+        blank=True,
+        width_field="event_image_width",
+        height_field="event_image_height",
+    )
+    event_image_width = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    event_image_height = models.PositiveIntegerField(
+        null=True, blank=True, editable=False
+    )
+    event_image_placeholder = models.TextField(blank=True, default="", editable=False)
+    event_image_derivatives = models.JSONField(default=dict, blank=True)
+    event_image_ready = models.BooleanField(default=False)
     booking_date = models.DateField()
     band_response = models.TextField(null=True, blank=True, default="Pending")
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "booking_date"], name="band_bookings_user_date"
+            ),
+            # Backs the date-range scans of the booking calendar.
+            models.Index(fields=["booking_date"], name="band_bookings_date"),
+        ]
+
     def __str__(self):
         """
         Returns a summary of the booking showing the
@@ -155,3 +244,38 @@ class Bookings(models.Model):
         return f"""Booking for {self.event_name} by
             {self.user} on {self.booking_date}
             """
+
+
+class BookingHistory(models.Model):
+    """
+    Model for expired bookings kept by the "archive" retention policy.
+
+    Fields:
+        - event_name, user, description, location, event_image,
+        booking_date, band_response: Copied from the expired Bookings row.
+        - archived_at: When the booking was moved out of Bookings.
+    """
+
+    event_name = models.CharField(max_length=255, null=True, blank=True)
+    user = models.ForeignKey(
+        User,
+        related_name="booking_history",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+    )
+    description = models.TextField(null=True, blank=True)
+    location = models.CharField(max_length=100, null=True, blank=True)
+    event_image = models.ImageField(upload_to="event_images/", null=True, blank=True)
+    booking_date = models.DateField()
+    band_response = models.TextField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "booking history"
+
+    def __str__(self):
+        """
+        Returns a summary of the archived booking.
+        """
+        return f"Archived booking for {self.event_name} on {self.booking_date}"
@@ -0,0 +1,81 @@
+"""
+Endpoints for load balancers, autoscalers and Prometheus.
+
+/healthz answers as long as the process serves requests, without
+touching the database, so a database outage doesn't get every worker
+restarted. /readyz also runs a trivial query on each database and
+answers 503 when one of them can't be reached, to take the instance
+out of rotation until it can. /metrics serves the Prometheus metrics
+(see band.metrics), only to scrapers presenting METRICS_TOKEN if one is
+set.
+"""
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from .metrics import exposition
+
+
+@require_safe
+@never_cache
+def healthz(req):
+    """
+    Liveness check.
+
+    Returns:
+        JsonResponse: {"status": "ok"}.
+    """
+    return JsonResponse({"status": "ok"})
+
+
+def _check(alias):
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return False
+    return True
+
+
+@require_safe
+@never_cache
+def readyz(req):
+    """
+    Readiness check: one SELECT 1 on the primary and each replica, on a
+    pooled connection when pooling is on.
+
+    Returns:
+        JsonResponse: "status" and "databases", each "ok" or
+        "unavailable"; with a 503 if any is unavailable.
+    """
+    databases = {
+        alias: "ok" if _check(alias) else "unavailable" for alias in settings.DATABASES
+    }
+    ready = all(state == "ok" for state in databases.values())
+    return JsonResponse(
+        {"status": "ready" if ready else "unavailable", "databases": databases},
+        status=200 if ready else 503,
+    )
+
+
+@require_safe
+@never_cache
+def metrics(req):
+    """
+    Prometheus metrics of every worker process.
+
+    Returns:
+        HttpResponse: The metrics in the Prometheus text format, or a
+        403 without the right bearer token when METRICS_TOKEN is set.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        req.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
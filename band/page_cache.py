@@ -0,0 +1,116 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from .cache import BandCache
+
+page_cache = BandCache("page")
+
+
+def invalidate_pages():
+    """
+    Drops every cached anonymous page by moving to a new generation.
+    """
+    page_cache.invalidate()
+
+
+def page_key(req):
+    """
+    Returns the key of the page at the request's full path, query
+    string included, in the current generation. The key is built once
+    per request, so a page rendered while a change commits is stored
+    under the old generation and never served afterwards.
+    """
+    path = hashlib.md5(req.get_full_path().encode()).hexdigest()
+    return f"{page_cache.generation()}:{req.method}:{path}"
+
+
+def is_anonymous_request(req):
+    """
+    Tells whether a request can be answered from the page cache.
+    Only the session cookie is looked at, so no session or user is
+    loaded; a visitor without one is anonymous.
+    """
+    return (
+        req.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in req.COOKIES
+    )
+
+
+def cache_anonymous_page(view):
+    """
+    Decorator serving the same cached response to every anonymous
+    visitor of a page. A cache hit never reaches the view, the session
+    or the ORM.
+    While rendering a page for the cache, ``req.cacheable_page`` is
+    True and templates must leave out anything per-user: the CSRF
+    token and "you liked this" markers are filled in afterwards from
+    the uncached session_state view.
+    Pages are cached for BAND_PAGE_CACHE_TIMEOUT seconds (0 disables
+    the cache) or until invalidate_pages() is called.
+    Works on sync and async views; cache round trips of async views run
+    in a worker thread.
+    """
+
+    def cached(req):
+        key = page_key(req)
+        response = page_cache.get(key)
+        if response is not None:
+            # Pages are dropped whenever what they show changes, so the
+            # validators stored with them are current.
+            response = get_conditional_response(
+                req,
+                etag=response.get("ETag"),
+                last_modified=parse_http_date_safe(response.get("Last-Modified")),
+                response=response,
+            )
+            response["X-Page-Cache"] = "hit"
+        return key, response
+
+    def store(req, key, response, timeout):
+        # Logged-in visitors get a different page at the same URL.
+        patch_vary_headers(response, ("Cookie",))
+        if (
+            response.status_code == 200
+            and not response.cookies
+            and not req.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        ):
+            page_cache.set(key, response, timeout)
+        response["X-Page-Cache"] = "miss"
+        return response
+
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(req, *args, **kwargs):
+            timeout = settings.BAND_PAGE_CACHE_TIMEOUT
+            if not timeout or not is_anonymous_request(req):
+                return await view(req, *args, **kwargs)
+
+            key, response = await sync_to_async(cached)(req)
+            if response is not None:
+                return response
+            req.cacheable_page = True
+            response = await view(req, *args, **kwargs)
+            return await sync_to_async(store)(req, key, response, timeout)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(req, *args, **kwargs):
+        timeout = settings.BAND_PAGE_CACHE_TIMEOUT
+        if not timeout or not is_anonymous_request(req):
+            return view(req, *args, **kwargs)
+
+        key, response = cached(req)
+        if response is not None:
+            return response
+        req.cacheable_page = True
+        response = view(req, *args, **kwargs)
+        return store(req, key, response, timeout)
+
+    return wrapper
@@ -0,0 +1,234 @@
+import base64
+import datetime
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    """
+    One page of a keyset-paginated listing.
+
+    Fields:
+        - object_list: The objects on this page, newest first.
+        - next_cursor: Opaque cursor for the following (older) page, or
+        None on the last page.
+        - prev_cursor: Opaque cursor for the preceding (newer) page, or
+        None on the first page.
+    """
+
+    object_list: list = field(default_factory=list)
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def encode_cursor(direction, obj):
+    """
+    Encodes a page boundary as an opaque, URL-safe cursor.
+
+    Args:
+        direction (str): "n" to fetch the page after obj,
+        "p" to fetch the page before it.
+        obj: The boundary row, a model instance or a .values() dict
+        with "date" and "id"; its date and pk are encoded.
+    """
+    if isinstance(obj, dict):
+        date, pk = obj["date"], obj["id"]
+    else:
+        date, pk = obj.date, obj.pk
+    raw = f"{direction}|{date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def encode_id_cursor(direction, obj):
+    """
+    Encodes a page boundary of a listing paginated by id alone, as
+    encode_cursor does.
+
+    Args:
+        direction (str): "n" or "p", as for encode_cursor.
+        obj: The boundary row, a model instance or a .values() dict
+        with "id".
+    """
+    pk = obj["id"] if isinstance(obj, dict) else obj.pk
+    raw = f"{direction}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return base64.urlsafe_b64decode(padded).decode().split("|")
+
+
+def decode_cursor(cursor):
+    """
+    Decodes a cursor made by encode_cursor.
+
+    Returns:
+        tuple: (direction, date, pk), or None when the cursor is missing
+        or malformed, which callers treat as the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        direction, date, pk = _decode(cursor)
+        if direction not in ("n", "p"):
+            return None
+        return direction, datetime.date.fromisoformat(date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def decode_id_cursor(cursor):
+    """
+    Decodes a cursor made by encode_id_cursor.
+
+    Returns:
+        tuple: (direction, pk), or None when the cursor is missing or
+        malformed, which callers treat as the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        direction, pk = _decode(cursor)
+        if direction not in ("n", "p"):
+            return None
+        return direction, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def paginate_by_date(queryset, cursor=None, per_page=25):
+    """
+    Returns one page of queryset ordered by (date, id), newest first,
+    using keyset pagination. Each page is a range scan that starts at the
+    cursor's (date, id) position on the composite (date, id) index, so
+    deep pages cost the same as the first one, unlike OFFSET.
+
+    Args:
+        queryset (QuerySet): Rows to paginate, model instances or
+        .values() dicts including "date" and "id". Its ordering is
+        replaced.
+        cursor (str, optional): A cursor from a previous KeysetPage.
+        per_page (int): Number of events per page.
+
+    Returns:
+        KeysetPage: The page with its next/previous cursors.
+    """
+    position = decode_cursor(cursor)
+    return _keyset_page(
+        list(_page_rows(queryset, position, per_page)), position, per_page
+    )
+
+
+async def apaginate_by_date(queryset, cursor=None, per_page=25):
+    """Async version of paginate_by_date."""
+    position = decode_cursor(cursor)
+    rows = [row async for row in _page_rows(queryset, position, per_page)]
+    return _keyset_page(rows, position, per_page)
+
+
+async def apaginate_by_id(queryset, cursor=None, per_page=25):
+    """
+    Returns one page of queryset ordered by id, newest first, using
+    keyset pagination like apaginate_by_date. For rows whose date may be
+    NULL, which can't be compared to a cursor's date.
+
+    Args:
+        queryset (QuerySet): Rows to paginate, model instances or
+        .values() dicts including "id". Its ordering is replaced.
+        cursor (str, optional): A cursor from a previous KeysetPage.
+        per_page (int): Number of rows per page.
+
+    Returns:
+        KeysetPage: The page with its next/previous cursors.
+    """
+    position = decode_id_cursor(cursor)
+    if position and position[0] == "p":
+        rows = queryset.filter(pk__gt=position[1]).order_by("pk")
+    elif position:
+        rows = queryset.filter(pk__lt=position[1]).order_by("-pk")
+    else:
+        rows = queryset.order_by("-pk")
+    rows = [row async for row in rows[: per_page + 1]]
+    return _keyset_page(rows, position, per_page, encode_id_cursor)
+
+
+def page_changes(queryset, cursor=None, per_page=25):
+    """
+    Reads the updated_at and id of the rows paginate_by_date puts on a
+    page, and of the row telling whether another page follows, with the
+    same range scan. They differ as soon as the page does: when one of
+    its rows is edited, deleted or added, or moves in or out of it.
+    Validates conditional GETs of a page without counting the table.
+
+    Args:
+        queryset (QuerySet): Rows to paginate, as for paginate_by_date.
+        cursor (str, optional): A cursor from a previous KeysetPage.
+        per_page (int): Number of rows per page.
+
+    Returns:
+        list: (updated_at, id) pairs.
+    """
+    position = decode_cursor(cursor)
+    return list(
+        _page_rows(queryset.values_list("updated_at", "pk"), position, per_page)
+    )
+
+
+async def apage_changes(queryset, cursor=None, per_page=25):
+    """Async version of page_changes."""
+    position = decode_cursor(cursor)
+    rows = _page_rows(queryset.values_list("updated_at", "pk"), position, per_page)
+    return [row async for row in rows]
+
+
+def _page_rows(queryset, position, per_page):
+    # One more row than the page holds tells whether another page follows.
+    if position and position[0] == "p":
+        _, date, pk = position
+        # Walk backwards from the cursor; _keyset_page restores the order.
+        return (
+            queryset.filter(date__gte=date)
+            .filter(Q(date__gt=date) | Q(pk__gt=pk))
+            .order_by("date", "pk")[: per_page + 1]
+        )
+    if position:
+        _, date, pk = position
+        queryset = queryset.filter(date__lte=date).filter(
+            Q(date__lt=date) | Q(pk__lt=pk)
+        )
+    return queryset.order_by("-date", "-pk")[: per_page + 1]
+
+
+def _keyset_page(rows, position, per_page, encode=encode_cursor):
+    if position and position[0] == "p":
+        has_previous = len(rows) > per_page
+        object_list = rows[:per_page][::-1]
+        has_next = True
+    else:
+        has_previous = position is not None
+        object_list = rows[:per_page]
+        has_next = len(rows) > per_page
+
+    page = KeysetPage(object_list=object_list)
+    if object_list and has_next:
+        page.next_cursor = encode("n", object_list[-1])
+    if object_list and has_previous:
+        page.prev_cursor = encode("p", object_list[0])
+    return page
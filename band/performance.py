@@ -0,0 +1,221 @@
+"""
+Per-request performance measurements.
+
+PerformanceMiddleware measures a sample of the requests
+(PERFORMANCE_SAMPLE_RATE): their SQL queries and the time spent in them,
+the time spent rendering templates, the hits and misses of the band
+caches (band.cache), and the total time. They are sent back in a
+Server-Timing header, which browsers' developer tools show, and logged
+as one line per request on the "band.performance" logger. A request
+running more queries than its budget, or the same statement over and
+over (an N+1 pattern), is logged as a warning.
+
+The measurements of the request being answered live in a context
+variable, which follows the request into the worker threads running its
+queries and templates. Requests that aren't sampled have none, and the
+hooks cost them one lookup of it.
+"""
+
+import logging
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.django import reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+from .metrics import DB_QUERIES
+
+logger = logging.getLogger(__name__)
+
+_metrics = ContextVar("band_performance_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    What one request spent its time on. Durations are in seconds.
+
+    Attributes:
+        queries (int): SQL statements run.
+        sql_time (float): Time spent running them.
+        statements (Counter): How often each SQL statement, parameters
+        left out, was run.
+        template_time (float): Time spent rendering templates, queries
+        they ran included.
+        cache_hits (int): Reads answered by the band caches.
+        cache_misses (int): Reads the band caches couldn't answer.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def repeated_statements(self):
+        """
+        Returns the statements run more than PERFORMANCE_REPEATED_QUERIES
+        times, with their counts, most repeated first.
+        """
+        limit = settings.PERFORMANCE_REPEATED_QUERIES
+        return [
+            (sql, count)
+            for sql, count in self.statements.most_common()
+            if count > limit
+        ]
+
+
+def _time_query(execute, sql, params, many, context):
+    DB_QUERIES.inc()
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_time += time.perf_counter() - start
+        metrics.queries += 1
+        metrics.statements[sql] += 1
+
+
+def install_query_timer(connection):
+    """
+    Counts the queries of a database connection for band.metrics, and
+    times them for the requests being measured. Installed on every
+    connection as it opens (see band.signals); a reconnecting connection
+    keeps the one it has.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def record_cache_read(hit):
+    """Counts a read of a band cache for the request being measured."""
+    metrics = _metrics.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class _TimedTemplate(DjangoTemplate):
+    def render(self, context=None, request=None):
+        metrics = _metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing the templates rendered for the
+    requests being measured. Templates included by others are part of
+    their time.
+    """
+
+    def from_string(self, template_code):
+        return _TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return _TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def query_budget(queries):
+    """
+    Decorator setting the most queries a view function or class is
+    expected to run, instead of PERFORMANCE_QUERY_BUDGET. A measured
+    request going over it is logged as a warning.
+
+    Args:
+        queries (int): The view's budget.
+    """
+
+    def decorator(view):
+        view.query_budget = queries
+        return view
+
+    return decorator
+
+
+def start_request(req):
+    """
+    Starts measuring a request, if it is sampled.
+
+    Returns:
+        Token: To be passed to finish_request, or None if the request
+        isn't measured.
+    """
+    rate = settings.PERFORMANCE_SAMPLE_RATE
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None
+    return _metrics.set(RequestMetrics())
+
+
+def _server_timing(metrics, total):
+    return ", ".join(
+        (
+            f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template_time * 1000:.1f}",
+            f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+            f"total;dur={total * 1000:.1f}",
+        )
+    )
+
+
+def finish_request(token, req, response):
+    """
+    Stops measuring a request, adds the Server-Timing header to its
+    response and logs the measurements.
+    """
+    if token is None:
+        return response
+    metrics = _metrics.get()
+    _metrics.reset(token)
+    total = time.perf_counter() - metrics.start
+    response["Server-Timing"] = _server_timing(metrics, total)
+
+    match = getattr(req, "resolver_match", None)
+    view = match and getattr(match.func, "view_class", match.func)
+    fields = {
+        "method": req.method,
+        "path": req.path,
+        "view": match and match.view_name,
+        "status": response.status_code,
+        "duration_ms": round(total * 1000, 1),
+        "queries": metrics.queries,
+        "sql_ms": round(metrics.sql_time * 1000, 1),
+        "template_ms": round(metrics.template_time * 1000, 1),
+        "cache_hits": metrics.cache_hits,
+        "cache_misses": metrics.cache_misses,
+    }
+    message = " ".join(f"{name}={value}" for name, value in fields.items())
+
+    budget = getattr(view, "query_budget", settings.PERFORMANCE_QUERY_BUDGET)
+    problems = []
+    if metrics.queries > budget:
+        problems.append(f"over_budget={budget}")
+    for sql, count in metrics.repeated_statements():
+        problems.append(f'repeated={count} sql="{sql[:200]}"')
+    if problems:
+        logger.warning(
+            "%s %s", message, " ".join(problems), extra={"performance": fields}
+        )
+    else:
+        logger.info("%s", message, extra={"performance": fields})
+    return response
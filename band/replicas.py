@@ -0,0 +1,155 @@
+"""
+Read replicas with read-your-writes.
+
+Only views marked with read_from_replica read from a replica; every
+other query, and every write, goes to the primary. A replica lags the
+primary a little, so a visitor who just wrote something must not be
+sent to one: ReadYourWritesMiddleware notices writes made while
+answering a request and sets a cookie that keeps the visitor's requests
+on the primary for DATABASE_REPLICA_STICKY_SECONDS. The routing of the
+request being answered is kept in a context variable, which follows it
+into the worker threads of async views.
+"""
+
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "band_primary"
+
+# Apps whose rows are always read from the primary: a session or user
+# just saved must be found on the visitor's next request.
+PRIMARY_APPS = {"auth", "sessions"}
+
+
+class Routing:
+    """
+    Where the reads of the request being answered go.
+
+    Attributes:
+        primary (bool): Reads stay on the primary: the visitor wrote
+        recently, or this request wrote.
+        replica (str): The replica this request reads from, once marked
+        with read_from_replica; one per request, so all its reads see
+        the same state.
+        wrote (bool): Whether the request wrote to the database.
+    """
+
+    def __init__(self, primary):
+        self.primary = primary
+        self.replica = None
+        self.wrote = False
+
+
+_routing = ContextVar("band_replica_routing", default=None)
+
+
+def start_request(req):
+    """
+    Sets up the routing of a request's queries.
+
+    Returns:
+        Token: To be passed to finish_request.
+    """
+    return _routing.set(Routing(primary=STICKY_COOKIE in req.COOKIES))
+
+
+def finish_request(token, response):
+    """
+    Ends the routing of a request's queries, keeping the visitor on the
+    primary for a while if the request wrote.
+    """
+    routing = _routing.get()
+    _routing.reset(token)
+    if routing.wrote and settings.DATABASE_REPLICAS:
+        response.set_cookie(
+            STICKY_COOKIE,
+            "1",
+            max_age=settings.DATABASE_REPLICA_STICKY_SECONDS,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+def _use_replica(req):
+    routing = _routing.get()
+    # Anonymous pages rendered for the page cache come from the primary:
+    # one rendered from a replica that hasn't caught up with the change
+    # that invalidated the cache would be served stale until it expires.
+    if (
+        routing is None
+        or routing.primary
+        or not settings.DATABASE_REPLICAS
+        or getattr(req, "cacheable_page", False)
+    ):
+        return
+    if routing.replica is None:
+        routing.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def read_from_replica(view):
+    """
+    Decorator sending the reads of a view to a replica, unless the
+    visitor wrote within the last DATABASE_REPLICA_STICKY_SECONDS.
+    Reads made while a template response it returns is rendered go to
+    the same replica. Works on sync and async views.
+    """
+    if iscoroutinefunction(view):
+
+        @wraps(view)
+        async def async_wrapper(req, *args, **kwargs):
+            _use_replica(req)
+            return await view(req, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(req, *args, **kwargs):
+        _use_replica(req)
+        return view(req, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Routes the reads of views marked with read_from_replica to the
+    request's replica, sessions and users excepted, and everything else
+    to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if (
+            routing is None
+            or routing.replica is None
+            or routing.primary
+            or model._meta.app_label in PRIMARY_APPS
+            # Reads inside a transaction must see its writes.
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            # The rest of the request reads its own writes, and so does
+            # the visitor's next few requests.
+            routing.wrote = True
+            routing.primary = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their tables from the primary.
+        return db == DEFAULT_DB_ALIAS
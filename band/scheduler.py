@@ -0,0 +1,72 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .archival import archive_expired_events
+from .retention import purge_expired_bookings
+
+logger = logging.getLogger(__name__)
+
+# (job name, callable, setting holding the interval in seconds)
+JOBS = [
+    ("archive-events", archive_expired_events, "BAND_ARCHIVE_INTERVAL"),
+    ("purge-bookings", purge_expired_bookings, "BOOKING_RETENTION_INTERVAL"),
+]
+
+_started = False
+_lock = threading.Lock()
+
+
+class PeriodicJob(threading.Thread):
+    """
+    Daemon thread that runs a job every ``interval`` seconds.
+
+    The job's database connection is closed after each run so the thread
+    never holds a connection between runs. Errors are logged and the
+    thread keeps running. The jobs count their own runs in band.metrics
+    (see band.metrics.recorded_job).
+    """
+
+    def __init__(self, name, func, interval):
+        super().__init__(name=f"band-{name}", daemon=True)
+        self.func = func
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic job %s failed", self.name)
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start_scheduler():
+    """
+    Starts the in-process periodic jobs enabled in settings.
+    A job is enabled when its interval setting is greater than zero.
+    Calling this more than once in a process has no effect.
+
+    Returns:
+        list: The started PeriodicJob threads.
+    """
+    global _started
+    with _lock:
+        if _started:
+            return []
+        _started = True
+    jobs = [
+        PeriodicJob(name, func, getattr(settings, setting))
+        for name, func, setting in JOBS
+        if getattr(settings, setting) > 0
+    ]
+    for job in jobs:
+        job.start()
+    return jobs
@@ -0,0 +1,73 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .availability import invalidate_availability
+from .images import schedule_derivatives
+from .models import Bookings, Comments, Likes, PastEvent, UpcomingEvent
+from .performance import install_query_timer
+from .versions import bump_version
+
+
+@receiver([post_save, post_delete], sender=UpcomingEvent)
+@receiver([post_save, post_delete], sender=Bookings)
+def availability_changed(sender, **kwargs):
+    """Drops the cached booking calendar when events or bookings change."""
+    invalidate_availability()
+
+
+@receiver([post_save, post_delete], sender=PastEvent)
+@receiver([post_save, post_delete], sender=UpcomingEvent)
+def event_changed(sender, instance, **kwargs):
+    """Invalidates the cached fragments of an edited or deleted event."""
+    bump_version(sender, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comments)
+@receiver([post_save, post_delete], sender=Likes)
+def engagement_changed(sender, instance, **kwargs):
+    """Invalidates the cached fragments of a past event whose comments
+    or likes changed."""
+    bump_version(PastEvent, instance.event_id)
+
+
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def comment_changed(sender, instance, created=False, **kwargs):
+    """Marks a past event as changed when one of its comments is edited
+    or deleted, e.g. in the admin. New comments need nothing here: the
+    comment view updates the event's counters, and updated_at with them."""
+    if not created:
+        PastEvent.objects.filter(pk=instance.event_id).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=UpcomingEvent.likes.through)
+def upcoming_likes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Invalidates the cached fragments of upcoming events whose likes
+    changed through the likes relation, e.g. in the admin. The
+    auto-created through model sends no save/delete signals, so
+    like_upcoming_event bumps the version itself."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        bump_version(UpcomingEvent, instance.pk)
+    else:
+        for pk in pk_set or ():
+            bump_version(UpcomingEvent, pk)
+
+
+@receiver(post_save, sender=PastEvent)
+@receiver(post_save, sender=UpcomingEvent)
+@receiver(post_save, sender=Bookings)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """Arranges for the resized copies of a newly uploaded image to be
+    built, see band.images.schedule_derivatives."""
+    if not raw:
+        schedule_derivatives(instance)
+
+
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    """Lets band.performance time the queries of a new connection."""
+    install_query_timer(connection)
@@ -0,0 +1,150 @@
+"""
+Concurrent write benchmark for the SQLite settings.
+
+Several worker processes, like gunicorn's, toggle likes on the same
+event as fast as they can through the view's own write path, each on a
+connection of its own per write, as requests get. The benchmark runs on
+a throwaway database file, so the project's data is never touched, and
+reports how many writes failed with "database is locked" and how long
+the others took.
+"""
+
+import multiprocessing
+import os
+import queue
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Settings read by fictional_band.database in each benchmark process.
+PROFILES = {
+    "default": {"DATABASE_SQLITE_TUNING": "False"},
+    "tuned": {"DATABASE_SQLITE_TUNING": "True"},
+}
+
+
+def _setup(database, profile):
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ.update(PROFILES[profile])
+    import django
+
+    django.setup()
+
+
+def _prepare(database, profile, workers):
+    _setup(database, profile)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    from .models import PastEvent
+
+    call_command("migrate", verbosity=0)
+    User.objects.bulk_create(User(username=f"bench-{n}") for n in range(workers))
+    PastEvent.objects.create(
+        name="Benchmark", date=timezone.localdate(), location="Nowhere"
+    )
+
+
+def _write(database, profile, index, writes, barrier, results):
+    _setup(database, profile)
+    from django.contrib.auth.models import User
+    from django.db import OperationalError, connection
+
+    from .models import Likes, PastEvent
+    from .views import _toggle_like
+
+    user = User.objects.get(username=f"bench-{index}")
+    event_id = PastEvent.objects.get().pk
+    connection.close()
+
+    durations, errors = [], 0
+    barrier.wait()
+    for _ in range(writes):
+        start = time.perf_counter()
+        try:
+            _toggle_like(PastEvent, Likes, "event_id", user, event_id)
+        except OperationalError:
+            errors += 1
+        else:
+            durations.append(time.perf_counter() - start)
+        # Requests don't keep their connection (CONN_MAX_AGE is 0).
+        connection.close()
+    results.put((durations, errors))
+
+
+def _results(results, processes):
+    outcomes = []
+    while len(outcomes) < len(processes):
+        try:
+            outcomes.append(results.get(timeout=1))
+        except queue.Empty:
+            if any(process.exitcode for process in processes):
+                raise RuntimeError("A benchmark worker failed.")
+    return outcomes
+
+
+def _run(context, target, *args):
+    process = context.Process(target=target, args=args)
+    process.start()
+    return process
+
+
+def run_sqlite_benchmark(profile, workers=4, writes=200):
+    """
+    Runs the write benchmark with one of the SQLite PROFILES.
+
+    Args:
+        profile (str): "default" or "tuned".
+        workers (int): Number of writing processes.
+        writes (int): Likes toggled by each process.
+
+    Returns:
+        dict: "writes" attempted, "ok" and "errors" counts, "elapsed"
+        seconds, "throughput" in successful writes per second, and the
+        "p50", "p95" and "max" seconds a successful write took.
+    """
+    # Fresh processes, so each one reads the profile's settings.
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / "bench.sqlite3"
+        process = _run(context, _prepare, database, profile, workers)
+        process.join()
+        if process.exitcode:
+            raise RuntimeError("Preparing the benchmark database failed.")
+
+        # The parent joins the barrier too, to time from the moment all
+        # workers are ready.
+        barrier = context.Barrier(workers + 1)
+        results = context.Queue()
+        processes = [
+            _run(context, _write, database, profile, index, writes, barrier, results)
+            for index in range(workers)
+        ]
+        try:
+            barrier.wait(timeout=120)
+        except threading.BrokenBarrierError:
+            raise RuntimeError("The benchmark workers failed to start.")
+        start = time.perf_counter()
+        outcomes = _results(results, processes)
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+    durations = sorted(d for outcome in outcomes for d in outcome[0])
+    stats = {
+        "writes": workers * writes,
+        "ok": len(durations),
+        "errors": sum(outcome[1] for outcome in outcomes),
+        "elapsed": elapsed,
+        "throughput": len(durations) / elapsed,
+    }
+    if durations:
+        stats.update(
+            p50=statistics.median(durations),
+            p95=durations[max(0, round(len(durations) * 0.95) - 1)],
+            max=durations[-1],
+        )
+    return stats
@@ -0,0 +1,64 @@
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+HASHED_NAME = re.compile(r"[0-9a-f]{64}\.[0-9a-z]+")
+
+
+def is_content_addressed(name):
+    """Tells whether a stored file is named after the hash of its contents."""
+    return bool(HASHED_NAME.fullmatch(posixpath.basename(name)))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file after the SHA-256 of its
+    contents, keeping the directory and extension of the requested name,
+    e.g. "event_images/flyer.JPG" is stored as "event_images/<hash>.jpg".
+
+    Saving bytes that are already stored returns the existing file
+    instead of writing a copy, so the same flyer uploaded for many
+    bookings takes up space once. Since a name always refers to the
+    same bytes, its URL can be cached forever.
+
+    Files may be shared by several rows, so they must not be deleted
+    along with one of them.
+    """
+
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        dirname, basename = posixpath.split(name)
+        _, extension = posixpath.splitext(basename)
+        return posixpath.join(dirname, digest.hexdigest() + extension.lower())
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+class LenientManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's storage of collected static files: hashed names for
+    far-future caching plus gzip/brotli copies.
+
+    A file referenced by a template but missing from the manifest, e.g.
+    one not in static/ when collectstatic ran, is linked under its plain
+    name, which answers 404, instead of failing the whole page with
+    "Missing staticfiles manifest entry".
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not in the manifest and not on disk to be hashed either.
+            return name
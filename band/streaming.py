@@ -0,0 +1,61 @@
+"""
+Response bodies that stream under both WSGI and ASGI servers.
+
+Django buffers a streaming response whose iterator doesn't match the
+server (a sync iterator under ASGI, an async one under WSGI) in memory,
+with a warning. Views producing bodies chunk by chunk hand their sync
+iterator to stream_body, which adapts it when served over ASGI.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+def is_async_request(req):
+    """Tells whether a request is being served by an ASGI server."""
+    return isinstance(req, ASGIRequest)
+
+
+async def aiterate(iterator):
+    """
+    Pulls a sync iterator in a worker thread one chunk at a time, so
+    blocking reads never run on the event loop and nothing is buffered.
+    The iterator is closed if the client goes away early.
+    """
+    iterator = iter(iterator)
+    try:
+        while True:
+            chunk = await sync_to_async(next, thread_sensitive=False)(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if hasattr(iterator, "close"):
+            await sync_to_async(iterator.close, thread_sensitive=False)()
+
+
+async def _in_loop(iterator):
+    for chunk in iterator:
+        yield chunk
+
+
+def stream_body(req, iterator, blocking=True):
+    """
+    Returns a sync iterator of response chunks in the form the server
+    serving req consumes without buffering.
+
+    Args:
+        req (_type_): The request being answered.
+        iterator (iterable): The body's chunks.
+        blocking (bool): Whether producing a chunk blocks, e.g. on a
+        file read. Chunks built in memory are produced on the event loop,
+        sparing a thread hop per chunk.
+
+    Returns:
+        The iterator itself under WSGI, an async iterator under ASGI.
+    """
+    if not is_async_request(req):
+        return iterator
+    if blocking:
+        return aiterate(iterator)
+    return _in_loop(iterator)
@@ -0,0 +1,76 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def _srcset(storage, variants, format_name):
+    return ", ".join(
+        f"{storage.url(variant['name'])} {variant['width']}w"
+        for variant in variants
+        if variant["format"] == format_name
+    )
+
+
+def _img_attrs(field_file, placeholder, attrs):
+    field = field_file.field
+    dimensions = {
+        "width": getattr(field_file.instance, field.width_field or "", None),
+        "height": getattr(field_file.instance, field.height_field or "", None),
+    }
+    attrs = {
+        **{name: value for name, value in dimensions.items() if value},
+        "loading": "lazy",
+        "decoding": "async",
+        **attrs,
+    }
+    if placeholder:
+        style = f"background: url({placeholder}) center / cover no-repeat"
+        attrs["style"] = "; ".join(filter(None, [attrs.get("style"), style]))
+    return flatatt(attrs)
+
+
+@register.simple_tag
+def responsive_image(
+    field_file, derivatives=None, sizes="100vw", placeholder="", **attrs
+):
+    """
+    Renders an image with srcset/sizes pointing at its resized copies, so
+    the browser downloads the smallest one that fits. WebP copies are
+    offered first through <picture>, with the JPEG copies as fallback.
+    Images without current derivatives are rendered as a plain <img> of
+    the original; a missing image renders nothing.
+
+    The stored width/height of the image are emitted so the browser
+    reserves its space before it loads, and the placeholder data: URI is
+    shown as its background meanwhile. Images are lazy-loaded unless
+    loading="eager" is passed.
+
+    Usage:
+        {% responsive_image event.image event.image_derivatives
+            sizes="(min-width: 768px) 540px, 100vw"
+            placeholder=event.image_placeholder class="img-fluid" %}
+    """
+    if not field_file:
+        return ""
+    derivatives = derivatives or {}
+    variants = (
+        derivatives.get("variants", [])
+        if derivatives.get("source") == field_file.name
+        else []
+    )
+    img_attrs = _img_attrs(field_file, placeholder, attrs)
+    if not variants:
+        return format_html('<img src="{}"{} />', field_file.url, img_attrs)
+    storage = field_file.storage
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}" />'
+        '<img src="{}" srcset="{}" sizes="{}"{} /></picture>',
+        _srcset(storage, variants, "webp"),
+        sizes,
+        field_file.url,
+        _srcset(storage, variants, "jpeg"),
+        sizes,
+        img_attrs,
+    )
@@ -0,0 +1,122 @@
+"""
+Resizing and encoding of event images.
+
+This module only depends on Pillow, so worker processes started with
+the "spawn" method can import it without setting Django up.
+"""
+
+import base64
+import io
+
+from PIL import ExifTags, Image, ImageOps
+
+# Widths, in pixels, of the resized copies made of every event image.
+DERIVATIVE_WIDTHS = (320, 640, 960)
+
+# (format name, Pillow encoder, file extension, encoder options)
+DERIVATIVE_FORMATS = (
+    ("webp", "WEBP", "webp", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+# Width, in pixels, of the preview inlined in pages while an image loads.
+PLACEHOLDER_WIDTH = 16
+
+
+def _encode(image, encoder, options):
+    if encoder == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, encoder, **options)
+    return buffer.getvalue()
+
+
+def render_placeholder(image):
+    """
+    Encodes a tiny copy of an image as a WebP data: URI. Pages inline it
+    as the image's background, stretched and blurred by the browser, so
+    the space has roughly the right colours before the image arrives.
+    """
+    width = min(PLACEHOLDER_WIDTH, image.width)
+    height = max(1, round(image.height * width / image.width))
+    small = image.resize((width, height), Image.Resampling.BOX)
+    data = _encode(small, "WEBP", {"quality": 40})
+    return "data:image/webp;base64," + base64.b64encode(data).decode("ascii")
+
+
+def displayed_size(image):
+    """
+    Returns the size of an opened image once its EXIF orientation is
+    applied, as exif_transpose would turn it, without decoding it.
+
+    Returns:
+        tuple: (width, height)
+    """
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        # Orientations 5-8 are a quarter turn, which swaps the sides.
+        return height, width
+    return width, height
+
+
+def image_metadata(data):
+    """
+    Reads the size of an image, as displayed, and renders its
+    placeholder. JPEGs are decoded at a reduced scale, which is all the
+    placeholder needs.
+
+    Args:
+        data (bytes): The contents of the image.
+
+    Returns:
+        tuple: (width, height, placeholder data: URI)
+    """
+    image = Image.open(io.BytesIO(data))
+    # Read before draft(), which shrinks the size to the reduced scale.
+    width, height = displayed_size(image)
+    image.draft("RGB", (PLACEHOLDER_WIDTH * 4, PLACEHOLDER_WIDTH * 4))
+    return width, height, render_placeholder(ImageOps.exif_transpose(image))
+
+
+def render_image(data):
+    """
+    Creates resized copies of an image in every width of
+    DERIVATIVE_WIDTHS and every format of DERIVATIVE_FORMATS, plus a
+    placeholder from render_placeholder.
+    Images are never scaled up: widths at or above the original's are
+    skipped, and an image narrower than all of them gets one copy per
+    format at its own width.
+
+    Args:
+        data (bytes): The contents of the original image.
+
+    Returns:
+        dict: "placeholder", the data: URI, and "variants", a list of
+        {"format", "width", "height", "extension", "content"} dicts, one
+        per copy, with the encoded bytes in "content".
+    """
+    image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    image.load()
+
+    widths = [width for width in DERIVATIVE_WIDTHS if width < image.width]
+    if not widths:
+        widths = [image.width]
+
+    variants = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        if width == widths[0]:
+            # Shrinking the smallest copy is much cheaper than the original.
+            placeholder = render_placeholder(resized)
+        for format_name, encoder, extension, options in DERIVATIVE_FORMATS:
+            variants.append(
+                {
+                    "format": format_name,
+                    "width": width,
+                    "height": height,
+                    "extension": extension,
+                    "content": _encode(resized, encoder, options),
+                }
+            )
+    return {"placeholder": placeholder, "variants": variants}
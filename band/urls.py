@@ -1,14 +1,41 @@
 from django.urls import path, include
-from . import views
+from . import api, monitoring, views
 
 app_name = "band"
 urlpatterns = [
     path("", views.home, name="home"),
     path("events", views.events, name="events"),
     path("like_event/<int:event_id>", views.like_event, name="like_event"),
+    path(
+        "like_upcoming_event/<int:event_id>",
+        views.like_upcoming_event,
+        name="like_upcoming_event",
+    ),
     path("comment/<int:event_id>", views.comment, name="comment"),
+    path("session-state", views.session_state, name="session_state"),
+    path("live-counts", views.live_counts, name="live_counts"),
     path("details/<int:pk>", views.ModelDetailView.as_view(), name="details"),
     path("bookings", views.booking, name="booking"),
+    path(
+        "availability/<int:year>/<int:month>",
+        views.availability,
+        name="availability",
+    ),
     path("mybookings", views.my_bookings, name="my_bookings"),
+    path("api/v1/events/past", api.past_events, name="api_past_events"),
+    path(
+        "api/v1/events/past/<int:pk>/comments",
+        api.event_comments,
+        name="api_event_comments",
+    ),
+    path("api/v1/events/upcoming", api.upcoming_events, name="api_upcoming_events"),
+    path(
+        "api/v1/calendar/<int:year>/<int:month>",
+        api.booking_calendar,
+        name="api_booking_calendar",
+    ),
+    path("healthz", monitoring.healthz, name="healthz"),
+    path("readyz", monitoring.readyz, name="readyz"),
+    path("metrics", monitoring.metrics, name="metrics"),
     path("", include("auth_app.urls")),
 ]
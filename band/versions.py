@@ -0,0 +1,66 @@
+import time
+
+from django.db import transaction
+
+from .cache import BandCache
+from .page_cache import invalidate_pages
+
+version_cache = BandCache("version", timeout=None)
+
+
+def version_key(model, pk):
+    """
+    Returns the key, within the version namespace, holding the render
+    version of one event.
+    """
+    return f"{model._meta.model_name}:{pk}"
+
+
+def _new_version():
+    # A timestamp rather than a counter: if the key is evicted, the
+    # next version can never collide with one of the old fragments.
+    return time.time_ns()
+
+
+def attach_versions(events):
+    """
+    Sets ``cache_version`` on each event, for use as a template fragment
+    cache key. All versions are fetched with one cache round trip and
+    events without a version are given a new one.
+
+    Args:
+        events (iterable): PastEvent and/or UpcomingEvent instances.
+
+    Returns:
+        list: The same events, as a list.
+    """
+    events = list(events)
+    keys = {event: version_key(type(event), event.pk) for event in events}
+    versions = version_cache.get_many(keys.values())
+    missing = {key: _new_version() for key in keys.values() if key not in versions}
+    if missing:
+        version_cache.set_many(missing)
+        versions.update(missing)
+    for event, key in keys.items():
+        event.cache_version = versions[key]
+    return events
+
+
+def bump_version(model, pk):
+    """
+    Moves an event to a new render version once the current transaction
+    commits, so cached fragments of the old version are no longer used
+    and a fragment rendered before the commit is never stored under the
+    new version. Cached anonymous pages, which embed the fragments, are
+    dropped at the same time.
+
+    Args:
+        model (Model): PastEvent or UpcomingEvent.
+        pk (int): The event's primary key.
+    """
+
+    def bump():
+        version_cache.set(version_key(model, pk), _new_version())
+        invalidate_pages()
+
+    transaction.on_commit(bump)
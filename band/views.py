@@ -1,25 +1,101 @@
+import json
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponseRedirect
+from django.template.loader import render_to_string
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse_lazy, reverse
+from .availability import month_availability
+from .conditional import adetails_validators, conditional_page, page_validators
 from .forms import CommentsForm, BookingsForm
+from .live import counts_changed, hub, parse_watched, read_counts
 from .models import PastEvent, Comments, Likes, Bookings, UpcomingEvent
+from .page_cache import cache_anonymous_page
+from .pagination import apage_changes, apaginate_by_date
+from .performance import query_budget
+from .replicas import read_from_replica
+from .streaming import is_async_request
+from .versions import attach_versions, bump_version
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.views.decorators.cache import never_cache
+from django.utils.decorators import method_decorator
 from django.views.generic import DetailView
+from django.middleware.csrf import get_token
 from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch
+from asgiref.sync import sync_to_async
+
+EVENTS_PER_PAGE = 25
+# Seconds between comment lines keeping an idle live-counts stream open
+# through proxies.
+LIVE_COUNTS_HEARTBEAT = 15
 
 
 # Create your views here.
+@cache_anonymous_page
 def home(req):
     return render(req, "home.html")
 
 
-def events(req):
+def _event_lists(req):
+    """
+    Returns the two lists of the events page, as (queryset, cursor)
+    pairs: past events, and upcoming events that haven't passed yet.
+    """
+    return (
+        (PastEvent.objects.all(), req.GET.get("past")),
+        # Hide events that have passed but not been archived yet.
+        (
+            UpcomingEvent.objects.filter(date__gte=timezone.now().date()),
+            req.GET.get("upcoming"),
+        ),
+    )
+
+
+async def _events_validators(req):
+    """Validators of the events page, from the rows of both lists."""
+    changes = []
+    for queryset, cursor in _event_lists(req):
+        changes += await apage_changes(queryset, cursor, EVENTS_PER_PAGE)
+    return page_validators(req, ("events",), changes)
+
+
+# Validators and the rows of both lists, and the session and user of
+# logged-in visitors; more means an N+1 crept in.
+@query_budget(6)
+@cache_anonymous_page
+@read_from_replica
+@conditional_page(_events_validators)
+async def events(req):
     """
     View to display past and upcoming events.
-    This view retrieves all past events and upcoming events,
-    and deletes any past events from the upcoming events list.
-    It also creates dictionaries to hold comments and likes per event.
+    This view only reads: moving expired upcoming events into past
+    events is done by the archive_events command or the periodic job
+    (see band.archival).
+    Comment and like totals are read from the counters stored on each
+    event, so the page runs a fixed number of queries no matter how many
+    events it shows.
+    Both lists are keyset paginated, newest first: the "past" and
+    "upcoming" query parameters carry the opaque cursors of the page
+    to show for each list.
+    Each event card is a template fragment cached under the event's
+    render version (see band.versions) and updated_at, so a card
+    rendered from a replica that was behind is not served once it has
+    caught up. Reads go to a replica (see band.replicas), and anonymous
+    visitors are served the whole page from cache (see band.page_cache).
+    Clients revalidating a page that hasn't changed get a 304 before
+    any of this runs (see band.conditional).
+    The view is async: its queries run without tying a thread to the
+    request under an ASGI server.
     The view handles the form for comments and likes.
 
     Args:
@@ -27,45 +103,42 @@ def events(req):
 
 
     Returns:
-       returns the rendered template with past and upcoming events,
-         comments, likes, and the comment form.
-    """
-    past_events = PastEvent.objects.all().order_by("-date")[:25]
-    up_coming_events = UpcomingEvent.objects.all().order_by("-date")[:25]
-    for event in up_coming_events:
-        if event.date < timezone.now().date():
-            PastEvent.objects.create(
-                name=event.name,
-                description=event.description,
-                date=event.date,
-                location=event.location,
-            )
-            event.delete()
-
-    # Create dictionaries to hold comments and likes per event
-    all_comments = {
-        event.id: Comments.objects.filter(event=event) for event in past_events
-    }
-    all_likes = {event.id: Likes.objects.filter(event=event) for event in past_events}
+       returns the rendered template with a page of past and upcoming
+         events and the comment form.
+    """
+    past_events, up_coming_events = [
+        await apaginate_by_date(queryset, cursor, EVENTS_PER_PAGE)
+        for queryset, cursor in _event_lists(req)
+    ]
+    await sync_to_async(attach_versions)([*past_events, *up_coming_events])
     form = CommentsForm()
-    return render(
+    # Context processors load the session and the user lazily, which
+    # the ORM only allows outside the event loop.
+    return await sync_to_async(render)(
         req,
         "events.html",
         {
             "past_events": past_events,
             "up_coming_events": up_coming_events,
-            "all_comments": all_comments,
-            "all_likes": all_likes,
             "form": form,
         },
     )
 
 
+# Validators, the event and its prefetched comments, and the session and
+# user of logged-in visitors.
+@query_budget(5)
+@method_decorator(read_from_replica, name="get")
+@method_decorator(conditional_page(adetails_validators), name="get")
 class ModelDetailView(DetailView):
     """
     View to display details of a specific event.
     This view retrieves the event based on the provided primary key (pk)
     and renders the details template with the event information.
+    Clients revalidating a page whose event and comments haven't
+    changed get a 304 without it being rendered (see band.conditional).
+    The view is async; Django renders its template response in a worker
+    thread.
 
     Args:
         DetailView (_type_): Django's generic view for displaying
@@ -77,38 +150,263 @@ class ModelDetailView(DetailView):
     template_name = "details.html"
     context_object_name = "event"
 
+    def get_queryset(self):
+        """
+        Prefetches the comments with their authors so the template does
+        not query per comment.
+        """
+        return PastEvent.objects.prefetch_related(
+            Prefetch("comments", queryset=Comments.objects.select_related("user"))
+        )
+
+    async def aget_object(self, queryset=None):
+        """
+        Async version of get_object. Attaches the event's render
+        version, which keys the cached header fragment.
+        """
+        if queryset is None:
+            queryset = self.get_queryset()
+        try:
+            event = await queryset.aget(pk=self.kwargs["pk"])
+        except PastEvent.DoesNotExist:
+            raise Http404("No event matches the given query.")
+        await sync_to_async(attach_versions)([event])
+        return event
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+def _toggle_like(event_model, like_model, event_field, user, event_id):
+    """
+    Toggles the user's like on an event and adjusts the event's
+    like_count in the same transaction.
+    The like is removed with a single DELETE; only when nothing was
+    deleted is a like inserted, and the unique constraint on
+    (user, event) rejects a duplicate from a concurrent click instead
+    of a read-then-write check.
+
+    Args:
+        event_model (Model): PastEvent or UpcomingEvent.
+        like_model (Model): The model holding one row per like.
+        event_field (str): Name of like_model's column pointing at
+        the event.
+        user (User): The user liking or unliking the event.
+        event_id (int): The ID of the event.
+
+    Raises:
+        Http404: If the event does not exist, or was deleted while the
+        like was being added.
+        IntegrityError: If adding the like broke any other constraint.
+
+    Returns:
+        bool: True if the event is now liked by the user.
+    """
+    lookup = {event_field: event_id, "user": user}
+    with transaction.atomic():
+        removed, _ = like_model.objects.filter(**lookup).delete()
+        liked = not removed
+        if liked:
+            try:
+                with transaction.atomic():
+                    like_model.objects.create(**lookup)
+            except IntegrityError:
+                # Either a concurrent request liked the event first, or
+                # the event was deleted meanwhile and the foreign key
+                # rejected the like.
+                if like_model.objects.filter(**lookup).exists():
+                    return True
+                if not event_model.objects.filter(pk=event_id).exists():
+                    raise Http404("No event matches the given query.")
+                raise
+        updated = event_model.objects.filter(pk=event_id).update(
+            like_count=F("like_count") + (1 if liked else -1),
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            raise Http404("No event matches the given query.")
+        if like_model._meta.auto_created:
+            # Many-to-many through rows send no save/delete signals.
+            bump_version(event_model, event_id)
+        counts_changed()
+    return liked
+
+
+def _wants_json(req):
+    """
+    Tells the background requests made by the page's scripts, which
+    prefer JSON or send X-Requested-With, from plain form submissions.
+    """
+    if req.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return True
+    return req.get_preferred_type(["text/html", "application/json"]) == (
+        "application/json"
+    )
+
+
+def _like_response(req, event_model, event_id, liked):
+    """
+    Answers a like toggle: a redirect to the events page for forms, or
+    the new like state and count for scripts.
+    """
+    if not _wants_json(req):
+        return HttpResponseRedirect(reverse("band:events"))
+    like_count = (
+        event_model.objects.filter(pk=event_id)
+        .values_list("like_count", flat=True)
+        .first()
+    )
+    return JsonResponse({"liked": liked, "like_count": like_count})
+
 
 @login_required
 def like_event(req, event_id):
     """
     View to handle liking and unliking events.
-    This view retrieves the event based on the provided event_id,
-    and toggles the like status for the user.
+    This view toggles the like status of the event with the
+    provided event_id for the user.
     If the user has already liked the event, it removes the like.
     If the user has not liked the event, it adds a like.
+    The event's like_count is adjusted in the same transaction.
     This view is protected by the login_required decorator,
 
     Args:
         req (_type_): the Function takes a request object as an argument.
         It is used to access the user making the request.
         event_id (_type_): The ID of the event to be liked or unliked.
-        It is used to retrieve the specific event from the database.
 
     Returns:
-        returns an HTTP response redirecting to the events page.
+        returns an HTTP response redirecting to the events page, or
+        for background requests, JSON with "liked" and "like_count".
         If the user is not logged in,
         they will be redirected to the login page.
     """
-    event = get_object_or_404(PastEvent, pk=event_id)
+    liked = _toggle_like(PastEvent, Likes, "event_id", req.user, event_id)
+    return _like_response(req, PastEvent, event_id, liked)
+
+
+@login_required
+def like_upcoming_event(req, event_id):
+    """
+    View to handle liking and unliking upcoming events.
+    Toggles the user in the event's likes and adjusts the event's
+    like_count in the same transaction.
 
-    like = Likes.objects.filter(user=req.user, event=event).first()
+    Args:
+        req (_type_): the Function takes a request object as an argument.
+        It is used to access the user making the request.
+        event_id (_type_): The ID of the upcoming event to be liked
+        or unliked.
 
-    if like:
-        like.delete()
+    Returns:
+        returns an HTTP response redirecting to the events page, or
+        for background requests, JSON with "liked" and "like_count".
+    """
+    liked = _toggle_like(
+        UpcomingEvent,
+        UpcomingEvent.likes.through,
+        "upcomingevent_id",
+        req.user,
+        event_id,
+    )
+    return _like_response(req, UpcomingEvent, event_id, liked)
+
+
+@never_cache
+def session_state(req):
+    """
+    Uncached JSON view with the per-user bits left out of cached pages:
+    the CSRF token for the page's forms and which of the listed events
+    the user has liked.
+
+    Args:
+        req (_type_): The request object. The "past" and "upcoming"
+        query parameters list the event IDs shown on the page.
+
+    Returns:
+        JsonResponse: "authenticated", "csrf_token" and the liked
+        event IDs under "liked".
+    """
+    liked = {"past": [], "upcoming": []}
+    if req.user.is_authenticated:
+        past_ids = [int(pk) for pk in req.GET.getlist("past") if pk.isdigit()]
+        upcoming_ids = [int(pk) for pk in req.GET.getlist("upcoming") if pk.isdigit()]
+        if past_ids:
+            liked["past"] = list(
+                Likes.objects.filter(user=req.user, event_id__in=past_ids).values_list(
+                    "event_id", flat=True
+                )
+            )
+        if upcoming_ids:
+            liked["upcoming"] = list(
+                UpcomingEvent.likes.through.objects.filter(
+                    user=req.user, upcomingevent_id__in=upcoming_ids
+                ).values_list("upcomingevent_id", flat=True)
+            )
+    return JsonResponse(
+        {
+            "authenticated": req.user.is_authenticated,
+            "csrf_token": get_token(req),
+            "liked": liked,
+        }
+    )
+
+
+def _counts_message(counts):
+    return f"event: counts\ndata: {json.dumps(counts)}\n\n"
+
+
+@never_cache
+async def live_counts(req):
+    """
+    Server-Sent Events stream of the like and comment counts of the
+    events shown on a page (see band.live). The first message holds the
+    current counts, which also brings pages served from cache up to
+    date; after that only changes are sent, at most one message per
+    LIVE_COUNTS_INTERVAL seconds.
+    A WSGI worker can't be tied up by a connection that never ends, so
+    there the first message is all that is sent, and the browser
+    reconnects after the retry delay, which turns the stream into
+    polling.
+
+    Args:
+        req (_type_): The request object. The "past" and "upcoming"
+        query parameters list the event IDs shown on the page, at most
+        a page of each.
+
+    Returns:
+        StreamingHttpResponse: The text/event-stream, or a 400 for IDs
+        that aren't integers or too many of them.
+    """
+    try:
+        watched = parse_watched(req.GET)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    retry = f"retry: {int(settings.LIVE_COUNTS_POLL * 1000)}\n"
+
+    if not is_async_request(req):
+        response = HttpResponse(
+            retry + _counts_message(await read_counts(watched)),
+            content_type="text/event-stream",
+        )
     else:
-        Likes.objects.create(user=req.user, event=event)
 
-    return HttpResponseRedirect(reverse("band:events"))
+        async def stream():
+            subscription = hub.subscribe(watched)
+            try:
+                yield retry + _counts_message(await read_counts(watched))
+                while True:
+                    changes = await subscription.changes(LIVE_COUNTS_HEARTBEAT)
+                    yield _counts_message(changes) if changes else ": keep-alive\n\n"
+            finally:
+                hub.unsubscribe(subscription)
+
+        response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    # Stops nginx and similar proxies from holding messages back.
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @login_required
@@ -118,8 +416,12 @@ def comment(req, event_id):
     This view retrieves the event based on the provided event_id,
     and processes the comment form submission.
     If the request method is POST, it validates the form and
-    saves the comment.
+    saves the comment, adding it to the event's comment_count and
+    rating_sum in the same transaction.
     If the form is valid, it redirects to the events page.
+    Background requests get JSON instead: the rendered comment and the
+    event's new comment count and average rating, or the form errors
+    with a 400.
 
     Args:
         req (_type_): the Function takes a request object as an argument.
@@ -130,23 +432,48 @@ def comment(req, event_id):
         returns the rendered template with the comment form.
         If the form is valid, it redirects to the events page.
     """
-    event = PastEvent.objects.get(pk=event_id)
+    event = get_object_or_404(PastEvent, pk=event_id)
     if req.method == "POST":
         form = CommentsForm(req.POST, user=req.user, event=event)
         if form.is_valid():
-            form.save()
-            return HttpResponseRedirect(reverse("band:events"))
+            with transaction.atomic():
+                new_comment = form.save()
+                PastEvent.objects.filter(pk=event.pk).update(
+                    comment_count=F("comment_count") + 1,
+                    rating_sum=F("rating_sum") + new_comment.rating,
+                    updated_at=timezone.now(),
+                )
+                counts_changed()
+            if not _wants_json(req):
+                return HttpResponseRedirect(reverse("band:events"))
+            comment_count, rating_sum = PastEvent.objects.values_list(
+                "comment_count", "rating_sum"
+            ).get(pk=event.pk)
+            return JsonResponse(
+                {
+                    "comment_count": comment_count,
+                    "rating": round(rating_sum / comment_count, 2),
+                    "html": render_to_string(
+                        "comment.html", {"comment": new_comment}, req
+                    ),
+                },
+                status=201,
+            )
+        if _wants_json(req):
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
     else:
         form = CommentsForm()
     return render(req, "events.html", {"form": form})
 
 
 @login_required()
+@read_from_replica
 def my_bookings(req):
     """
     View to display the user's bookings.
-    This view retrieves all bookings made by the user
-    and deletes any past bookings.
+    This view reads the user's bookings from today onwards in a single
+    query; expired bookings are removed by the purge_expired_bookings
+    command or the periodic job (see band.retention).
     Args:
     req (_type_): the Function takes a request object as an argument.
     It is used to access the user making the request and to render the
@@ -155,22 +482,38 @@ def my_bookings(req):
     Returns:
         returns the rendered template with the user's bookings.
     """
-    bookings = Bookings.objects.filter(user=req.user).order_by("-booking_date")
-    for booking in bookings:
-        print(booking.band_response)
-        if booking.booking_date < timezone.now().date():
-            booking.delete()
+    bookings = Bookings.objects.filter(
+        user=req.user, booking_date__gte=timezone.now().date()
+    ).order_by("-booking_date")
     return render(req, "my_bookings.html", {"bookings": bookings})
 
 
+def availability(req, year, month):
+    """
+    JSON view listing the free and taken booking dates of a month,
+    used by the date picker on the booking form.
+
+    Args:
+        req (_type_): The request object.
+        year (int): The calendar year.
+        month (int): The calendar month, 1-12.
+
+    Returns:
+        JsonResponse: The month's free and taken ISO dates.
+    """
+    try:
+        data = month_availability(year, month)
+    except ValueError:
+        raise Http404("No such month.")
+    return JsonResponse(data)
+
+
 @login_required()
 def booking(req):
     """
     View to handle booking requests.
-    Iterates through all upcoming events and deletes any that are past.
-    save past events to the PastEvent model from upcoming events.
-    Checks if the booking date is valid and not conflicting
-    with any upcoming events.
+    The form checks that the booking date is valid and not taken by an
+    upcoming event or another booking (see band.availability).
     If the form is valid, it saves the booking and
     redirects to the events page.
     If the request method is not POST, it initializes a new form.
@@ -182,29 +525,8 @@ def booking(req):
         after processing the booking.
         renders the booking template with the form if not POST.
     """
-    for event in UpcomingEvent.objects.all():
-        PastEvent.objects.create(
-            name=event.name,
-            description=event.description,
-            date=event.date,
-            location=event.location,
-        )
-        event.delete()
-
     if req.method == "POST":
         form = BookingsForm(req.POST, user=req.user)
-        print(req.user)
-        booking_date = form.data.get("booking_date")
-
-        if booking_date:
-            for event in UpcomingEvent.objects.all():
-                if event.date == booking_date:
-                    form.add_error(
-                        "booking_date",
-                        "There is an upcoming event on this date. Please choose another date.",
-                    )
-                    break
-
         if form.is_valid():
             form.save()
             return HttpResponseRedirect(reverse("band:events"))
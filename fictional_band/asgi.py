@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fictional_band.settings')
 
 application = get_asgi_application()
+
+from band.scheduler import start_scheduler  # noqa: E402
+
+start_scheduler()
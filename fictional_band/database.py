@@ -0,0 +1,135 @@
+"""
+Database settings, read from the environment.
+
+DATABASE_URL picks the database; without it the project uses SQLite in
+db.sqlite3. PostgreSQL connections are kept in a pool per process by
+default, so requests don't pay for opening a connection, and every
+statement runs under a time limit, over TLS unless turned off. SQLite
+can be tuned for several worker processes writing to the same file
+with DATABASE_SQLITE_TUNING.
+DATABASE_REPLICA_URLS adds read replicas, used by band.replicas.
+"""
+
+import dj_database_url
+from decouple import Csv, config
+
+POSTGRESQL = "django.db.backends.postgresql"
+
+# Run on every new SQLite connection when DATABASE_SQLITE_TUNING is on.
+SQLITE_PRAGMAS = (
+    # Write-ahead log: readers and the writer no longer block each other.
+    "PRAGMA journal_mode=WAL",
+    # With WAL, a commit survives the app crashing; only a power loss or
+    # OS crash can lose the last few, and commits skip an fsync.
+    "PRAGMA synchronous=NORMAL",
+    # Read the file through a 128 MiB memory map, cache 20 MiB of pages
+    # per connection and keep temporary tables in memory.
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _pool_max_size():
+    """
+    Returns the most connections one process's pool may open: at most
+    DATABASE_POOL_MAX_SIZE, and no more than its share of
+    DATABASE_MAX_CONNECTIONS, the connections all the web server's
+    WEB_CONCURRENCY worker processes may hold on one database server
+    together. Each process has its own pool, so without the cap the
+    workers could open workers × pool size connections, more than the
+    server (or the hosting plan) allows.
+    """
+    max_size = config("DATABASE_POOL_MAX_SIZE", default=10, cast=int)
+    budget = config("DATABASE_MAX_CONNECTIONS", default=20, cast=int)
+    if not budget:
+        return max_size
+    workers = max(config("WEB_CONCURRENCY", default=1, cast=int), 1)
+    return max(min(max_size, budget // workers), 1)
+
+
+def _postgresql_settings(database):
+    options = database.setdefault("OPTIONS", {})
+    # Hosted databases are reached over the network, so TLS is required
+    # unless turned off, as django_heroku did; an sslmode in the URL
+    # wins, e.g. ?sslmode=disable for a local server.
+    if config("DATABASE_SSL_REQUIRE", default=True, cast=bool):
+        options.setdefault("sslmode", "require")
+    timeout = config("DATABASE_STATEMENT_TIMEOUT", default=10000, cast=int)
+    if timeout:
+        # Milliseconds; a runaway query is cancelled instead of holding
+        # its connection and locks.
+        options["options"] = f"-c statement_timeout={timeout}"
+
+    if config("DATABASE_POOL", default=True, cast=bool):
+        # Pooled connections are returned after each request rather
+        # than closed, which also suits ASGI, where every request runs
+        # its queries in a thread of its own.
+        max_size = _pool_max_size()
+        options["pool"] = {
+            "min_size": min(
+                config("DATABASE_POOL_MIN_SIZE", default=2, cast=int), max_size
+            ),
+            "max_size": max_size,
+            "timeout": config("DATABASE_POOL_TIMEOUT", default=10.0, cast=float),
+        }
+        database["CONN_MAX_AGE"] = 0
+    else:
+        database["CONN_MAX_AGE"] = config("DATABASE_CONN_MAX_AGE", default=60, cast=int)
+
+
+def _sqlite_settings(database):
+    # SQLite connections are per thread, and under ASGI threads are per
+    # request, so persistent ones would pile up.
+    database["CONN_MAX_AGE"] = 0
+    if not config("DATABASE_SQLITE_TUNING", default=False, cast=bool):
+        return
+    options = database.setdefault("OPTIONS", {})
+    options["init_command"] = ";".join(SQLITE_PRAGMAS)
+    # Transactions take the write lock when they begin. A deferred one
+    # that reads first and writes later fails at once with "database is
+    # locked" when another process wrote in between, busy timeout or
+    # not; an immediate one waits its turn instead.
+    options["transaction_mode"] = "IMMEDIATE"
+    # Seconds a connection waits for the write lock before giving up.
+    options["timeout"] = config(
+        "DATABASE_SQLITE_BUSY_TIMEOUT", default=20.0, cast=float
+    )
+
+
+def _parse(url):
+    database = dj_database_url.parse(
+        url,
+        # Connections are checked before a request reuses them, so one
+        # dropped by the server is replaced instead of failing a query.
+        conn_health_checks=True,
+    )
+    if database["ENGINE"] == POSTGRESQL:
+        _postgresql_settings(database)
+    else:
+        _sqlite_settings(database)
+    return database
+
+
+def database_settings(base_dir):
+    """
+    Builds the DATABASES setting from DATABASE_URL and
+    DATABASE_REPLICA_URLS, a comma-separated list of read replicas.
+
+    Args:
+        base_dir (Path): The project directory, home of the default
+        SQLite database.
+
+    Returns:
+        dict: The DATABASES setting, with a "default" database and
+        "replica_1", "replica_2"... for the replicas.
+    """
+    url = config("DATABASE_URL", default=f"sqlite:///{base_dir / 'db.sqlite3'}")
+    databases = {"default": _parse(url)}
+    replica_urls = config("DATABASE_REPLICA_URLS", default="", cast=Csv())
+    for number, replica_url in enumerate(replica_urls, start=1):
+        replica = _parse(replica_url)
+        # Tests read the test database through the replicas too.
+        replica["TEST"] = {"MIRROR": "default"}
+        databases[f"replica_{number}"] = replica
+    return databases
@@ -13,8 +13,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 import django_heroku
-import dj_database_url
-from decouple import config
+from decouple import Choices, config
+
+from .database import database_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,7 +49,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the time they measure covers the rest of the stack.
+    "band.middleware.MetricsMiddleware",
+    "band.middleware.PerformanceMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    # Serves collected static files before any other middleware runs.
+    "band.middleware.AsyncWhiteNoiseMiddleware",
+    # Outside the session middleware, so session saves count as writes.
+    "band.middleware.ReadYourWritesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -61,7 +69,8 @@ ROOT_URLCONF = "fictional_band.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # Django's backend, timing renders for band.performance.
+        "BACKEND": "band.performance.TimedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -81,10 +90,51 @@ WSGI_APPLICATION = "fictional_band.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Picked from DATABASE_URL, SQLite by default; see fictional_band.database.
+DATABASES = database_settings(BASE_DIR)
+
+# Read replicas, from DATABASE_REPLICA_URLS. Views marked with
+# band.replicas.read_from_replica read from one of them; everything else,
+# and every request within DATABASE_REPLICA_STICKY_SECONDS of the
+# visitor's last write, uses the primary.
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["band.replicas.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = config(
+    "DATABASE_REPLICA_STICKY_SECONDS", default=10, cast=int
+)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND picks where band.cache keeps its entries:
+#   locmem - memory of each process (default, also used by the tests)
+#   file   - a directory shared by all gunicorn workers on one machine
+#   redis  - a Redis-protocol server shared by every machine
+#            (requires `pip install redis`)
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHE_BACKEND = config(
+    "CACHE_BACKEND", default="locmem", cast=Choices(list(CACHE_BACKENDS))
+)
+CACHE_LOCATION = config(
+    "CACHE_LOCATION",
+    default={
+        "locmem": "fictional-band",
+        "file": os.path.join(BASE_DIR, ".cache"),
+        "redis": "redis://127.0.0.1:6379/1",
+    }[CACHE_BACKEND],
+)
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": CACHE_LOCATION,
+        "KEY_PREFIX": "fictional_band",
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
     }
 }
 
@@ -129,7 +179,106 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 MEDIA_URL = "/event_images/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "event_images")
 
-django_heroku.settings(locals())
+# Uploads are named after the SHA-256 of their contents, which merges
+# duplicates and lets them be cached forever (see band.storage).
+# Outside DEBUG, collectstatic gives static files hashed names and
+# gzip/brotli copies, which WhiteNoise serves with far-future headers;
+# files it didn't collect are linked unhashed rather than failing pages.
+STORAGES = {
+    "default": {"BACKEND": "band.storage.ContentAddressedStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "band.storage.LenientManifestStaticFilesStorage"
+        )
+    },
+}
+
+# Seconds between runs of the in-process job that moves expired upcoming
+# events into past events. 0 disables it; run `manage.py archive_events`
+# from cron or a scheduler instead.
+BAND_ARCHIVE_INTERVAL = config("BAND_ARCHIVE_INTERVAL", default=0, cast=int)
+
+# What happens to bookings once their date has passed: "delete" drops
+# them, "archive" moves them into BookingHistory. Applied by
+# `manage.py purge_expired_bookings` or, when the interval is above 0,
+# by an in-process job.
+BOOKING_RETENTION_POLICY = config("BOOKING_RETENTION_POLICY", default="delete")
+BOOKING_RETENTION_INTERVAL = config("BOOKING_RETENTION_INTERVAL", default=0, cast=int)
+
+# Seconds a whole page (home, events) is cached for anonymous visitors.
+# Likes, comments and event changes drop the cached pages earlier.
+# 0 disables the page cache.
+BAND_PAGE_CACHE_TIMEOUT = config("BAND_PAGE_CACHE_TIMEOUT", default=300, cast=int)
+
+# Where the resized copies of uploaded images are built:
+# "inline" in the request, "pool" in a process pool of the web process
+# after the response's transaction commits, or "worker" by a separate
+# `manage.py process_images --loop` process. Until they exist pages
+# show the original image.
+IMAGE_PROCESSING = config(
+    "IMAGE_PROCESSING", default="pool", cast=Choices(["inline", "pool", "worker"])
+)
+# Processes of the image pool; 0 uses one per CPU core.
+IMAGE_WORKERS = config("IMAGE_WORKERS", default=0, cast=int)
+
+# Live like and comment counts (see band.live): at most one update per
+# LIVE_COUNTS_INTERVAL seconds goes to each open page, and changes made
+# through other web processes are picked up every LIVE_COUNTS_POLL
+# seconds.
+LIVE_COUNTS_INTERVAL = config("LIVE_COUNTS_INTERVAL", default=1.0, cast=float)
+LIVE_COUNTS_POLL = config("LIVE_COUNTS_POLL", default=5.0, cast=float)
+
+# Per-request measurements (see band.performance): the share of requests
+# measured, 0 to 1, the queries a view may run unless it sets its own
+# budget with band.performance.query_budget, and how often one statement
+# may run in a request before it is reported as an N+1 pattern.
+PERFORMANCE_SAMPLE_RATE = config(
+    "PERFORMANCE_SAMPLE_RATE", default=1.0 if DEBUG else 0.0, cast=float
+)
+PERFORMANCE_QUERY_BUDGET = config("PERFORMANCE_QUERY_BUDGET", default=20, cast=int)
+PERFORMANCE_REPEATED_QUERIES = config(
+    "PERFORMANCE_REPEATED_QUERIES", default=5, cast=int
+)
+
+# Bearer token Prometheus must send to read /metrics; empty leaves the
+# endpoint open, e.g. when only reachable from the private network.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# The console format is the one django_heroku used to set up.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "verbose": {
+            "format": (
+                "%(asctime)s [%(process)d] [%(levelname)s] "
+                "pathname=%(pathname)s lineno=%(lineno)s "
+                "funcname=%(funcName)s %(message)s"
+            ),
+            "datefmt": "%Y-%m-%d %H:%M:%S",
+        },
+    },
+    "handlers": {
+        "console": {
+            "level": "DEBUG",
+            "class": "logging.StreamHandler",
+            "formatter": "verbose",
+        },
+    },
+    "loggers": {
+        # Per-request measurements, see band.performance.
+        "band.performance": {"handlers": ["console"], "level": "INFO"},
+    },
+}
+
+# Static files, databases and logging are set up above rather than by
+# django_heroku.
+django_heroku.settings(locals(), staticfiles=False, databases=False, logging=False)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
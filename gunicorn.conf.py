@@ -0,0 +1,33 @@
+"""
+gunicorn settings, read from the working directory on start.
+
+Runs WEB_CONCURRENCY worker processes, and sets up the directory where
+they keep their Prometheus metrics (see band.metrics) before any of
+them starts, so a scrape of any worker reports the sum of all of them.
+"""
+
+import os
+import shutil
+import tempfile
+
+# gunicorn's own default, spelled out: fictional_band.database reads the
+# same variable to split DATABASE_MAX_CONNECTIONS between the workers.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), "fictional-band-metrics"),
+)
+
+
+def on_starting(server):
+    # Values left by a previous run would be added to this one's.
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)